@@ -1,31 +1,38 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import speech_recognition as sr
 import re
-from gtts import gTTS
 
-import os
-import tempfile
 from langdetect import detect, DetectorFactory
 
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 
-import wave
-import audioop
-import subprocess
-
-from status_extractor import check_pnr_combined, generate_pnr_summary
+import asyncio
+
+from audio_io import decode_audio_bytes, to_pcm16, AudioDecodeError, SAMPLE_RATE
+from vad import split_speech, vad_stats
+from tts import speech_response, tts_stats, load_engines as load_tts_engines
+from summary import summarize, start_summary, wait_summary, summary_stats # shared async llm client
+from pnr_schema import normalize_stats
+from status_extractor import (
+    check_pnr_async,
+    lookup_stats,
+    warm_driver_pool,
+    driver_pool_stats,
+    driver_pool,
+    pnr_cache_stats,
+    http_latency_stats,
+    provider_status,
+    hedge_stats,
+)
 
 # Set seed for language detection
 DetectorFactory.seed = 0
 
 
 load_dotenv()
-key = os.getenv("GROQ_API_KEY")
-model = ChatGroq(model="llama-3.3-70b-versatile", api_key=key)
 
 
 app = FastAPI()
@@ -40,11 +47,25 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup():
+    # launch the chrome pool in background so the server is up right away
+    asyncio.get_running_loop().run_in_executor(None, warm_driver_pool)
+    # tts voices load once per process, also in background
+    asyncio.get_running_loop().run_in_executor(None, load_tts_engines)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    driver_pool.close()
+
+
 class TextInput(BaseModel):
     text: str
 
 class PNRInput(BaseModel):
     pnr: str
+    deferred_summary: bool = False  # return pnr_data right away, summary comes from /pnr_summary/{summary_id}
     language: str = "english" 
 
 class TTSRequest(BaseModel):
@@ -54,73 +75,6 @@ class TTSRequest(BaseModel):
 
 
 
-def convert_to_wav(input_file: str, output_file: str) -> tuple[bool, str]:
-    """
-    Convert any audio input to WAV PCM signed 16-bit, mono, 16000 Hz using ffmpeg
-    Returns (success, stderr_text).
-    """
-    try:
-        # Build ffmpeg command to produce PCM S16 LE wav, mono, 16000 Hz
-        cmd = [
-            "ffmpeg",
-            "-y",                 # overwrite
-            "-nostdin",
-            "-loglevel", "error", # only show errors
-            "-i", input_file,
-            "-ac", "1",           # mono
-            "-ar", "16000",       # sampling rate
-            "-acodec", "pcm_s16le",
-            output_file
-        ]
-        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if proc.returncode != 0:
-            return False, proc.stderr or "ffmpeg failed with return code {}".format(proc.returncode)
-        # quick sanity check: file exists and non-empty
-        if not os.path.exists(output_file) or os.path.getsize(output_file) < 100:
-            return False, "Converted file missing or too small"
-        return True, ""
-    except FileNotFoundError:
-        return False, "ffmpeg not found; please install ffmpeg and make sure it's in PATH"
-    except Exception as e:
-        return False, str(e)
-
-
-
-def convert_to_wav_basic(input_file, output_file):
-    """Basic WAV conversion fallback"""
-    try:
-        # Read the input file as binary
-        with open(input_file, 'rb') as f:
-            audio_data = f.read()
-        
-        # Try to open as WAV and resave with correct parameters
-        with wave.open(input_file, 'rb') as wav_in:
-            params = wav_in.getparams()
-            frames = wav_in.readframes(params.nframes)
-            
-            # Convert to mono if stereo
-            if params.nchannels == 2:
-                frames = audioop.tomono(frames, params.sampwidth, 1, 1)
-                channels = 1
-            else:
-                channels = params.nchannels
-            
-            # Write new WAV file with correct format
-            with wave.open(output_file, 'wb') as wav_out:
-                wav_out.setnchannels(channels)
-                wav_out.setsampwidth(params.sampwidth)
-                wav_out.setframerate(params.framerate)
-                wav_out.writeframes(frames)
-        
-        return True
-    except Exception as e:
-        print(f"Basic WAV conversion error: {e}")
-        return False
-
-
-
-
-
 def detect_language(text):
     try:
         lang_code = detect(text)
@@ -158,59 +112,51 @@ def extract_pnr_from_text(text):
     return None
 
 
+def recognize_speech(recognizer, audio_data):
+    """google recognizer, en-IN first then hi-IN then default"""
+    try:
+        return recognizer.recognize_google(audio_data, language='en-IN')
+    except Exception:
+        try:
+            return recognizer.recognize_google(audio_data, language='hi-IN')
+        except Exception:
+            try:
+                return recognizer.recognize_google(audio_data)
+            except Exception as e:
+                raise Exception(f"Could not understand audio: {str(e)}")
 
 
 @app.post("/speech_to_text")
 async def speech_to_text(audio: UploadFile = File(...)):
     """Convert speech audio to text"""
-    temp_audio_path = None
-    converted_audio_path = None
-    
     try:
-        # derive extension from original filename if possible (fallback to .bin)
-        orig_ext = os.path.splitext(getattr(audio, "filename", "") or "")[1].lower() or ".bin"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=orig_ext) as temp_audio:
-            content = await audio.read()
-            if not content or len(content) < 10:
-                return JSONResponse(status_code=400, content={"success": False, "error": "Uploaded audio is empty or too small"})
-            temp_audio.write(content)
-            temp_audio_path = temp_audio.name
+        content = await audio.read()
+        if not content or len(content) < 10:
+            return JSONResponse(status_code=400, content={"success": False, "error": "Uploaded audio is empty or too small"})
         
-        # set output WAV path
-        converted_audio_path = temp_audio_path + ".wav"
-        
-        # Convert to WAV using ffmpeg (recommended)
-        conversion_success, conv_err = convert_to_wav(temp_audio_path, converted_audio_path)
-        
-        if not conversion_success:
-            # don't silently fallback to the original file – fail clearly so user/deploy knows to fix conversion
+        # decode in memory to 16 kHz mono pcm (native for wav, ffmpeg pipe for the rest), no temp files
+        try:
+            samples = await asyncio.to_thread(decode_audio_bytes, content)
+        except AudioDecodeError as e:
             return JSONResponse(status_code=400, content={
                 "success": False,
-                "error": "Conversion to WAV failed. Details: " + conv_err
+                "error": "Conversion to WAV failed. Details: " + str(e)
             })
         
+        # silence is trimmed before anything goes to google, clips with no speech stop here
+        segments = split_speech(samples)
+        if not segments:
+            return JSONResponse(status_code=400, content={"success": False, "error": "No speech detected in audio"})
+        
         # Initialize recognizer
         recognizer = sr.Recognizer()
-        recognizer.energy_threshold = 300
-        recognizer.dynamic_energy_threshold = True
-        
-        # Load audio file (now guaranteed to be a proper WAV)
-        with sr.AudioFile(converted_audio_path) as source:
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio_data = recognizer.record(source)
         
-        # Try to recognize speech
-        text = None
-        try:
-            text = recognizer.recognize_google(audio_data, language='en-IN')
-        except Exception:
-            try:
-                text = recognizer.recognize_google(audio_data, language='hi-IN')
-            except Exception:
-                try:
-                    text = recognizer.recognize_google(audio_data)
-                except Exception as e:
-                    raise Exception(f"Could not understand audio: {str(e)}")
+        # Try to recognize speech, long recordings go segment by segment
+        parts = []
+        for segment in segments:
+            audio_data = sr.AudioData(to_pcm16(segment), SAMPLE_RATE, 2)
+            parts.append(await asyncio.to_thread(recognize_speech, recognizer, audio_data))
+        text = " ".join(p for p in parts if p)
         
         if not text:
             raise Exception("No speech detected in audio")
@@ -221,14 +167,6 @@ async def speech_to_text(audio: UploadFile = File(...)):
         
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
-    finally:
-        # Clean up temp files
-        for p in (temp_audio_path, converted_audio_path):
-            if p and os.path.exists(p):
-                try:
-                    os.unlink(p)
-                except:
-                    pass
 
 
 @app.post("/extract_pnr")
@@ -258,7 +196,7 @@ async def extract_pnr(data: TextInput):
 async def get_pnr_status(data: PNRInput):
     """Get PNR status and generate AI summary - merged endpoint"""
     try:
-        pnr_data = check_pnr_combined(data.pnr)
+        pnr_data, cache_info = await check_pnr_async(data.pnr)
         
         if not pnr_data:
             return {
@@ -266,15 +204,27 @@ async def get_pnr_status(data: PNRInput):
                 "error": "Unable to fetch PNR status. Please verify the PNR number."
             }
         
-        summary = generate_pnr_summary(pnr_data)
+        # deferred: structured result now, the slow llm call runs in background
+        if data.deferred_summary:
+            summary, summary_id = None, await start_summary(pnr_data, data.language)
+        else:
+            summary, summary_id = await summarize(pnr_data, data.language), None
         
         return {
             "success": True,
             "pnr_data": pnr_data,
             "summary": summary,
-            "language": data.language
+            "summary_id": summary_id,
+            "language": data.language,
+            "cached": cache_info["cached"],
+            "cache_age": cache_info["age"]
         }
         
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=504,
+            content={"success": False, "error": "PNR lookup timed out. Please try again."}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -282,11 +232,27 @@ async def get_pnr_status(data: PNRInput):
         )
 
 
+@app.get("/pnr_summary/{summary_id}")
+async def pnr_summary(summary_id: str):
+    """Summary started by /get_pnr_status with deferred_summary, waits until it's ready"""
+    try:
+        summary = await wait_summary(summary_id)
+        if summary is None:
+            return JSONResponse(
+                status_code=404,
+                content={"success": False, "error": "Unknown or expired summary id"}
+            )
+        return {"success": True, "summary": summary}
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=504,
+            content={"success": False, "error": "Summary is taking too long. Please try again."}
+        )
+
+
 @app.post("/text_to_speech")
-async def text_to_speech(data: TTSRequest):
-    """Convert text to speech using gTTS"""
-    temp_audio_path = None
-    
+async def text_to_speech(data: TTSRequest, request: Request):
+    """Convert text to speech (TTS_ENGINE, gTTS by default)"""
     try:
         lang_map = {
             'hindi': 'hi',
@@ -295,21 +261,8 @@ async def text_to_speech(data: TTSRequest):
         
         lang_code = lang_map.get(data.language, 'en')
         
-        # Generate speech
-        tts = gTTS(text=data.text, lang=lang_code, slow=False)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-            tts.save(temp_audio.name)
-            temp_audio_path = temp_audio.name
-        
-        # Return audio file
-        return FileResponse(
-            temp_audio_path,
-            media_type="audio/mpeg",
-            filename="response.mp3",
-            background=None
-        )
+        # cached audio if we have it (or 304 if the browser does), otherwise streamed while synthesized
+        return await speech_response(data.text, lang_code, request.headers.get("if-none-match"))
         
     except Exception as e:
         return JSONResponse(
@@ -318,12 +271,40 @@ async def text_to_speech(data: TTSRequest):
         )
 
 
+@app.get("/text_to_speech")
+async def text_to_speech_get(text: str, language: str, request: Request):
+    """Same as POST but cacheable by the browser (ETag / Cache-Control)"""
+    return await text_to_speech(TTSRequest(text=text, language=language), request)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {"message": "PNR voice to voice agent running"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Lookup pool stats"""
+    return {
+        "pnr_lookup": lookup_stats(),
+        "driver_pool": driver_pool_stats(),
+        "pnr_cache": pnr_cache_stats(),
+        "http_latency": http_latency_stats(),
+        "hedging": hedge_stats(),
+        "pnr_normalize": normalize_stats(),
+        "vad": vad_stats(),
+        "summary": summary_stats(),
+        "tts": tts_stats(),
+    }
+
+
+@app.get("/providers")
+async def providers():
+    """Circuit breaker state and recent stats per PNR provider"""
+    return provider_status()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,313 @@
+import os
+import json
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+
+from asr_backends import create_backend
+from audio_io import to_wav_bytes
+
+load_dotenv()
+
+# speech to text config
+ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper") # whisper (openai) / faster-whisper (ctranslate2 int8)
+ASR_MODEL_SIZE = os.getenv("ASR_MODEL_SIZE", "medium") # tiny / base / small / medium / large
+ASR_SERVICE_URL = os.getenv("ASR_SERVICE_URL") # e.g. http://127.0.0.1:8001 -> use the shared asr_service, unset = load model in this process
+ASR_SERVICE_TIMEOUT = float(os.getenv("ASR_SERVICE_TIMEOUT", "60"))
+
+# inference runs in worker processes, each one loads the model once
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "1"))
+ASR_MAX_QUEUE = int(os.getenv("ASR_MAX_QUEUE", "4")) # jobs allowed to wait on top of the busy workers
+ASR_TIMEOUT = float(os.getenv("ASR_TIMEOUT", "60")) # per request deadline in sec
+ASR_RETRY_AFTER = int(os.getenv("ASR_RETRY_AFTER", "5")) # sec, sent back when we are full
+
+# micro batching: collect clips for up to ASR_BATCH_WAIT_MS and run the encoder on all of them at once
+ASR_BATCH_SIZE = int(os.getenv("ASR_BATCH_SIZE", "1")) # 1 = no batching
+ASR_BATCH_WAIT_MS = float(os.getenv("ASR_BATCH_WAIT_MS", "30"))
+
+
+class ASRBusy(Exception):
+    """all workers busy and the queue is full, try again after `retry_after` sec"""
+
+    def __init__(self, retry_after=ASR_RETRY_AFTER):
+        super().__init__("Speech recognition is busy, please retry shortly")
+        self.retry_after = retry_after
+
+
+class ASRTimeout(Exception):
+    """transcription did not finish within ASR_TIMEOUT"""
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+# load the model on first use (not at import), so api workers boot fast
+def get_backend():
+    global _backend
+
+    if _backend is not None:
+        return _backend
+
+    with _backend_lock:
+        if _backend is None:
+            print(f"loading {ASR_BACKEND} model '{ASR_MODEL_SIZE}'...")
+            _backend = create_backend(ASR_BACKEND, ASR_MODEL_SIZE)
+            print("asr model loaded")
+    return _backend
+
+
+# worker process side
+
+def _worker_init(threads):
+    try:
+        import torch
+        torch.set_num_threads(threads) # split the cores between workers instead of all fighting for all
+    except Exception:
+        pass
+    try:
+        get_backend()
+    except Exception as e:
+        print(f"asr model load failed in worker: {str(e)}")
+
+
+def _worker_ping():
+    return get_backend() is not None
+
+
+def _worker_transcribe(audio, options):
+    return get_backend().transcribe(audio, **options)
+
+
+def _worker_transcribe_batch(audios, options):
+    return get_backend().transcribe_batch(audios, options)
+
+
+# api process side
+
+_pool = None
+_pool_lock = threading.Lock()
+_ready_future = None
+_asr_lock = threading.Lock()
+_asr_stats = {"in_flight": 0, "completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "batches": 0, "batched_clips": 0}
+
+
+def get_pool():
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                threads = max(1, (os.cpu_count() or 1) // ASR_WORKERS)
+                _pool = ProcessPoolExecutor(
+                    max_workers=ASR_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"), # torch doesn't like fork
+                    initializer=_worker_init,
+                    initargs=(threads,),
+                )
+    return _pool
+
+
+# start the workers (and their model load) without waiting for it
+def load_in_background():
+    global _ready_future
+    _ready_future = get_pool().submit(_worker_ping)
+
+
+def _release(future):
+    with _asr_lock:
+        _asr_stats["in_flight"] -= 1
+        if future.cancelled():
+            return
+        _asr_stats["failed" if future.exception() else "completed"] += 1
+
+
+class _Batcher:
+    """Collects clips from concurrent requests and sends them to a worker as one batch"""
+
+    def __init__(self, max_size, max_wait):
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.queue = None
+        self.task = None
+        self._tasks = set() # running batches, the loop only keeps weak refs to tasks
+
+    def submit(self, audio, options):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue()
+            self.task = loop.create_task(self._run())
+        future = loop.create_future()
+        self.queue.put_nowait((audio, options, future))
+        return future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # only clips with the same options can share a decode
+            groups = {}
+            for item in batch:
+                groups.setdefault(json.dumps(item[1], sort_keys=True), []).append(item)
+            for items in groups.values():
+                task = loop.create_task(self._run_batch(items))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, items):
+        with _asr_lock:
+            _asr_stats["batches"] += 1
+            _asr_stats["batched_clips"] += len(items)
+
+        try:
+            results = await asyncio.wrap_future(
+                get_pool().submit(_worker_transcribe_batch, [i[0] for i in items], items[0][1])
+            )
+        except Exception as e:
+            results = [{"error": str(e)}] * len(items)
+
+        for (_, _, future), result in zip(items, results):
+            ok = "error" not in result
+            with _asr_lock:
+                _asr_stats["in_flight"] -= 1
+                _asr_stats["completed" if ok else "failed"] += 1
+            if future.done():
+                continue # caller already timed out
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(Exception(result["error"]))
+
+
+_batcher = _Batcher(ASR_BATCH_SIZE, ASR_BATCH_WAIT_MS / 1000)
+
+
+async def transcribe_async(audio, **options):
+    """Transcribe a file path or a float32 16 kHz numpy array without blocking the event loop.
+    Raises ASRBusy when the queue is full and ASRTimeout after ASR_TIMEOUT sec.
+    With ASR_BATCH_SIZE > 1 only `language` and `fp16` options are used."""
+
+    if ASR_SERVICE_URL:
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(_transcribe_remote, audio, options), ASR_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ASRTimeout("Speech recognition timed out")
+
+    with _asr_lock:
+        if _asr_stats["in_flight"] >= ASR_WORKERS * max(1, ASR_BATCH_SIZE) + ASR_MAX_QUEUE:
+            _asr_stats["rejected"] += 1
+            raise ASRBusy()
+        _asr_stats["in_flight"] += 1
+
+    # in_flight is only released when the worker is really done, a timed out job still holds its slot
+    job = None
+    if ASR_BATCH_SIZE > 1:
+        future = _batcher.submit(audio, options)
+    else:
+        job = get_pool().submit(_worker_transcribe, audio, options)
+        job.add_done_callback(_release)
+        future = asyncio.wrap_future(job)
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), ASR_TIMEOUT)
+    except asyncio.TimeoutError:
+        if job is not None:
+            job.cancel()
+        with _asr_lock:
+            _asr_stats["timed_out"] += 1
+        raise ASRTimeout("Speech recognition timed out")
+
+
+def asr_stats():
+    with _asr_lock:
+        stats = dict(_asr_stats)
+    stats["workers"] = ASR_WORKERS
+    stats["max_queue"] = ASR_MAX_QUEUE
+    stats["batch_size"] = ASR_BATCH_SIZE
+    stats["avg_batch"] = round(stats["batched_clips"] / stats["batches"], 2) if stats["batches"] else None
+    return stats
+
+
+def _transcribe_remote(audio, options):
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            name, data = os.path.basename(audio), f.read()
+    else:
+        name, data = "audio.wav", to_wav_bytes(audio) # already decoded, send 16 kHz pcm wav
+
+    try:
+        response = requests.post(
+            f"{ASR_SERVICE_URL}/transcribe",
+            files={"audio": (name, data)},
+            data={"options": json.dumps(options)},
+            timeout=ASR_SERVICE_TIMEOUT,
+        )
+    except requests.Timeout:
+        raise ASRTimeout("Speech recognition service timed out")
+    if response.status_code == 503:
+        raise ASRBusy(int(response.headers.get("Retry-After", ASR_RETRY_AFTER)))
+    if response.status_code == 504:
+        raise ASRTimeout("Speech recognition timed out")
+    response.raise_for_status()
+    return response.json()
+
+
+# blocking version for scripts, the api uses transcribe_async
+def transcribe_file(audio, **options):
+    """transcribe either in this process or on the shared asr service.
+    Returns {"text": ..., "language": ...}"""
+    if ASR_SERVICE_URL:
+        return _transcribe_remote(audio, options)
+    return get_backend().transcribe(audio, **options)
+
+
+def readiness():
+    """model status, "timed_out" is set when the asr service didn't answer in time"""
+    if ASR_SERVICE_URL:
+        try:
+            response = requests.get(f"{ASR_SERVICE_URL}/ready", timeout=2)
+            if response.status_code == 504:
+                return {"ready": False, "mode": "service", "timed_out": True, "error": "asr service timed out"}
+            status = response.json()
+            status["mode"] = "service"
+            return status
+        except requests.Timeout as e:
+            return {"ready": False, "mode": "service", "timed_out": True, "error": str(e)}
+        except Exception as e:
+            return {"ready": False, "mode": "service", "error": str(e)}
+
+    # ready once a worker process has loaded the model
+    ready, error = False, None
+    if _ready_future is not None and _ready_future.done():
+        error = _ready_future.exception()
+        ready = error is None and bool(_ready_future.result())
+
+    return {
+        "ready": ready,
+        "mode": "local",
+        "backend": ASR_BACKEND,
+        "model": ASR_MODEL_SIZE,
+        "workers": ASR_WORKERS,
+        "error": str(error) if error else None,
+    }
+
+
+async def readiness_async():
+    # asking the asr service is a blocking http call, keep it off the event loop
+    if ASR_SERVICE_URL:
+        return await asyncio.to_thread(readiness)
+    return readiness()
@@ -0,0 +1,237 @@
+import os
+import string
+
+from pnr_text import DIGIT_MAPPINGS, PNR_PROMPTS, PNR_CONTEXT_WORDS
+
+
+WHISPER_WINDOW_SEC = 30
+WHISPER_SAMPLE_RATE = 16000
+
+# pnr mode: short digit focused decode
+ASR_PNR_MAX_TOKENS = int(os.getenv("ASR_PNR_MAX_TOKENS", "64")) # 10 digits + a few words
+ASR_PNR_SUPPRESS = os.getenv("ASR_PNR_SUPPRESS", "false").lower() in ("1", "true", "yes") # suppress non digit tokens
+
+_ALLOWED_CHARS = set(string.digits + string.punctuation + " ")
+_DIGIT_WORDS = [w.lower() for w in list(DIGIT_MAPPINGS) + PNR_CONTEXT_WORDS]
+
+
+# can this token piece be part of a digit, a spoken digit word or pnr context?
+def _is_digit_piece(piece):
+    text = piece.strip().lower()
+    if not text or set(text) <= _ALLOWED_CHARS:
+        return True
+    text = text.strip(string.punctuation)
+    if text.isdigit():
+        return True
+    if "\ufffd" in text: # partial utf-8 byte of an indic character, can't judge it alone
+        return True
+    return any(text in word for word in _DIGIT_WORDS)
+
+
+class ASRBackend:
+    """Speech to text engine. `audio` is a file path (or anything the engine accepts).
+    transcribe returns {"text": ..., "language": ...}"""
+
+    name = None
+
+    def __init__(self, model_size):
+        self.model_size = model_size
+        self.model = None
+        self._suppress = None
+
+    def load(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio, **options):
+        raise NotImplementedError
+
+    def detect_language(self, audio):
+        raise NotImplementedError
+
+    # (token_id, text) for every normal text token of the vocabulary
+    def text_tokens(self):
+        raise NotImplementedError
+
+    def non_digit_tokens(self):
+        if self._suppress is None:
+            self._suppress = [tid for tid, piece in self.text_tokens() if not _is_digit_piece(piece)]
+        return self._suppress
+
+    def pnr_options(self, language, options):
+        """options for pnr mode: no word timestamps, digit prompt in the spoken language, capped length"""
+        opts = {k: v for k, v in options.items() if k not in ("pnr_mode", "word_timestamps", "verbose")}
+        opts.update(
+            language=language,
+            initial_prompt=PNR_PROMPTS.get(language, PNR_PROMPTS["en"]),
+            word_timestamps=False,
+            condition_on_previous_text=False,
+            sample_len=ASR_PNR_MAX_TOKENS,
+        )
+        if ASR_PNR_SUPPRESS:
+            opts["suppress_tokens"] = [-1] + self.non_digit_tokens() # -1 keeps the default non speech list
+        return opts
+
+    # engines without real batching just loop
+    def transcribe_batch(self, audios, options):
+        results = []
+        for audio in audios:
+            try:
+                results.append(self.transcribe(audio, **options))
+            except Exception as e:
+                results.append({"error": str(e)})
+        return results
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper (pytorch)"""
+
+    name = "whisper"
+
+    def load(self):
+        import whisper
+        self.model = whisper.load_model(self.model_size)
+
+    def transcribe(self, audio, **options):
+        if options.pop("pnr_mode", False):
+            import whisper
+            samples = whisper.load_audio(audio) if isinstance(audio, str) else audio
+            language = options.get("language") or self.detect_language(samples)
+            audio, options = samples, self.pnr_options(language, options)
+
+        result = self.model.transcribe(audio, **options)
+        return {"text": result["text"], "language": result.get("language")}
+
+    def _mel(self, samples):
+        import whisper
+        return whisper.log_mel_spectrogram(whisper.pad_or_trim(samples), self.model.dims.n_mels)
+
+    def detect_language(self, samples):
+        _, probs = self.model.detect_language(self._mel(samples).to(self.model.device))
+        return max(probs, key=probs.get)
+
+    def text_tokens(self):
+        from whisper.tokenizer import get_tokenizer
+        tokenizer = get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages)
+        for tid in range(tokenizer.eot):
+            yield tid, tokenizer.encoding.decode_single_token_bytes(tid).decode("utf-8", errors="replace")
+
+    def transcribe_batch(self, audios, options):
+        """Pad every clip to one 30 sec mel window, run encoder + decoder on the whole batch.
+        Clips longer than 30 sec go through normal transcribe."""
+        import torch
+        import whisper
+
+        results = [None] * len(audios)
+        batch_index, mels = [], []
+
+        for i, audio in enumerate(audios):
+            try:
+                samples = whisper.load_audio(audio) if isinstance(audio, str) else audio
+                if len(samples) > WHISPER_WINDOW_SEC * WHISPER_SAMPLE_RATE:
+                    results[i] = self.transcribe(audio, **options)
+                    continue
+                mels.append(self._mel(samples))
+                batch_index.append(i)
+            except Exception as e:
+                results[i] = {"error": str(e)}
+
+        if not mels:
+            return results
+        mel = torch.stack(mels).to(self.model.device)
+
+        if not options.get("pnr_mode"):
+            decode_options = whisper.DecodingOptions(
+                language=options.get("language"),
+                fp16=options.get("fp16", False),
+                without_timestamps=True,
+            )
+            for i, result in zip(batch_index, whisper.decode(self.model, mel, decode_options)):
+                results[i] = {"text": result.text, "language": result.language}
+            return results
+
+        # pnr mode: detect language for the whole batch, then decode each language group with its prompt
+        if options.get("language"):
+            languages = [options["language"]] * len(batch_index)
+        else:
+            _, probs = self.model.detect_language(mel)
+            languages = [max(p, key=p.get) for p in probs]
+
+        groups = {}
+        for row, language in enumerate(languages):
+            groups.setdefault(language, []).append(row)
+
+        for language, rows in groups.items():
+            opts = self.pnr_options(language, options)
+            decode_options = whisper.DecodingOptions(
+                language=language,
+                fp16=options.get("fp16", False),
+                without_timestamps=True,
+                prompt=opts["initial_prompt"],
+                sample_len=opts["sample_len"],
+                suppress_tokens=opts.get("suppress_tokens", "-1"),
+            )
+            decoded = whisper.decode(self.model, mel[rows], decode_options)
+            for row, result in zip(rows, decoded):
+                results[batch_index[row]] = {"text": result.text, "language": language}
+
+        return results
+
+
+class FasterWhisperBackend(ASRBackend):
+    """faster-whisper (CTranslate2), int8 on cpu by default"""
+
+    name = "faster-whisper"
+
+    # whisper.transcribe options faster-whisper understands, the rest (fp16, verbose) are dropped
+    SUPPORTED_OPTIONS = (
+        "language", "word_timestamps", "initial_prompt", "beam_size", "best_of", "temperature",
+        "suppress_tokens", "without_timestamps", "condition_on_previous_text",
+    )
+
+    def load(self):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            self.model_size,
+            device=os.getenv("ASR_DEVICE", "cpu"),
+            compute_type=os.getenv("ASR_COMPUTE_TYPE", "int8"),
+            cpu_threads=int(os.getenv("ASR_CPU_THREADS", "0")), # 0 = ctranslate2 default
+        )
+
+    def transcribe(self, audio, **options):
+        if options.pop("pnr_mode", False):
+            from faster_whisper.audio import decode_audio
+            samples = decode_audio(audio) if isinstance(audio, str) else audio
+            language = options.get("language") or self.detect_language(samples)
+            audio, options = samples, self.pnr_options(language, options)
+            options["without_timestamps"] = True
+
+        kwargs = {k: v for k, v in options.items() if k in self.SUPPORTED_OPTIONS}
+        if "sample_len" in options:
+            kwargs["max_new_tokens"] = options["sample_len"]
+        segments, info = self.model.transcribe(audio, **kwargs)
+        text = "".join(segment.text for segment in segments) # segments is a generator, this runs the decode
+        return {"text": text, "language": info.language}
+
+    def detect_language(self, samples):
+        language, _, _ = self.model.detect_language(samples)
+        return language
+
+    def text_tokens(self):
+        tokenizer = self.model.hf_tokenizer
+        eot = tokenizer.token_to_id("<|endoftext|>")
+        for tid in range(eot):
+            yield tid, tokenizer.decode([tid])
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def create_backend(name, model_size):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown ASR backend '{name}', choose from {', '.join(BACKENDS)}")
+    backend = BACKENDS[name](model_size)
+    backend.load()
+    return backend
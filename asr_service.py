@@ -0,0 +1,60 @@
+# shared speech to text service, holds the whisper model once for all api workers
+# run: uvicorn asr_service:app --host 127.0.0.1 --port 8001
+# then start the api workers with ASR_SERVICE_URL=http://127.0.0.1:8001
+import os
+import json
+import asyncio
+
+from fastapi import FastAPI, File, Form, UploadFile
+from fastapi.responses import JSONResponse
+
+import asr
+from audio_io import decode_audio_bytes, AudioDecodeError
+
+# this process is the service, never forward to ourselves
+asr.ASR_SERVICE_URL = None
+
+
+app = FastAPI()
+
+
+@app.on_event("startup")
+async def startup():
+    asr.load_in_background()
+
+
+@app.get("/metrics")
+async def metrics():
+    return {"asr": asr.asr_stats()}
+
+
+@app.get("/ready")
+def ready():
+    status = asr.readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.post("/transcribe")
+async def transcribe(audio: UploadFile = File(...), options: str = Form("{}")):
+    try:
+        samples = await asyncio.to_thread(decode_audio_bytes, await audio.read())
+        result = await asr.transcribe_async(samples, **json.loads(options))
+        return {"text": result["text"], "language": result.get("language")}
+
+    except AudioDecodeError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except asr.ASRBusy as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except asr.ASRTimeout as e:
+        return JSONResponse(status_code=504, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("ASR_SERVICE_PORT", "8001")))
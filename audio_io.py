@@ -0,0 +1,176 @@
+import io
+import subprocess
+import tempfile
+import threading
+import wave
+
+import numpy as np
+
+
+SAMPLE_RATE = 16000 # what whisper and the google recognizer get
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def _decode_wav(data):
+    """16 kHz pcm wav straight from memory, returns None if the file needs resampling/transcoding"""
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getframerate() != SAMPLE_RATE or wav.getcomptype() != "NONE":
+                return None
+            channels = wav.getnchannels()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    samples = np.frombuffer(frames, dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32) / 32768.0
+
+
+def _ffmpeg_cmd(source):
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-i", source,
+        "-f", "s16le",        # raw pcm out on stdout
+        "-ac", "1",           # mono
+        "-ar", str(SAMPLE_RATE),
+        "pipe:1",
+    ]
+
+
+def _needs_seeking(data):
+    # iso bmff (mp4 / m4a / mov / 3gp), the index can sit at the end where a pipe can't reach it
+    return data[4:8] == b"ftyp"
+
+
+def _decode_ffmpeg(data):
+    try:
+        proc = subprocess.run(_ffmpeg_cmd("pipe:0"), input=data, capture_output=True, check=False)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg not found; please install ffmpeg and make sure it's in PATH")
+
+    if proc.returncode == 0 and proc.stdout:
+        return np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+    # only mp4 style containers get a second try from a (seekable) temp file,
+    # anything else is just broken or cut short (partial webm while streaming) and fails right away
+    if _needs_seeking(data):
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as temp_audio:
+            temp_audio.write(data)
+            temp_audio.flush()
+            proc = subprocess.run(_ffmpeg_cmd(temp_audio.name), capture_output=True, check=False)
+
+    if proc.returncode != 0 or not proc.stdout:
+        err = proc.stderr.decode("utf-8", errors="replace").strip()
+        raise AudioDecodeError(err or f"ffmpeg failed with return code {proc.returncode}")
+    return np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def decode_audio_bytes(data):
+    """Any uploaded audio -> float32 mono numpy array at 16 kHz, without touching disk
+    (plain wav is parsed natively, everything else is piped through ffmpeg, only an mp4/m4a
+    that can't be read from a pipe goes through a temp file)"""
+    if not data:
+        raise AudioDecodeError("Uploaded audio is empty")
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        samples = _decode_wav(data)
+        if samples is not None:
+            return samples
+
+    return _decode_ffmpeg(data)
+
+
+class StreamDecoder:
+    """One ffmpeg per recording stream (websocket): container bytes go in as they arrive, pcm comes out
+    as ffmpeg gets to it. Every byte is decoded once however often the caller looks at the audio,
+    and chunks after the first need no header of their own (one growing webm stream)"""
+
+    def __init__(self):
+        cmd = _ffmpeg_cmd("pipe:0")
+        i = cmd.index("-i")
+        cmd[i:i] = ["-probesize", "32768", "-analyzeduration", "0"] # start decoding right after the header
+        try:
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise AudioDecodeError("ffmpeg not found; please install ffmpeg and make sure it's in PATH")
+        self._pcm = bytearray()
+        self._err = bytearray()
+        self._lock = threading.Lock()
+        self._readers = [
+            threading.Thread(target=self._drain, args=(self._proc.stdout, self._pcm), daemon=True),
+            threading.Thread(target=self._drain, args=(self._proc.stderr, self._err), daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    def _drain(self, pipe, out):
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            with self._lock:
+                out.extend(chunk)
+
+    def feed(self, data):
+        """blocking (pipe write), call it from a thread"""
+        try:
+            self._proc.stdin.write(data)
+            self._proc.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            raise AudioDecodeError(self._error() or "ffmpeg stopped decoding the stream")
+
+    def finish(self, timeout=10):
+        """end of input, waits for ffmpeg to decode the rest. Blocking, call it from a thread"""
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        for reader in self._readers:
+            reader.join(timeout)
+        try:
+            self._proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.close()
+        if len(self) == 0:
+            raise AudioDecodeError(self._error() or f"ffmpeg failed with return code {self._proc.returncode}")
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+
+    def samples(self, start=0):
+        """float32 samples decoded so far, from sample index `start` on"""
+        with self._lock:
+            data = bytes(self._pcm[start * 2:len(self._pcm) // 2 * 2])
+        return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pcm) // 2
+
+    def _error(self):
+        with self._lock:
+            return self._err.decode("utf-8", errors="replace").strip()
+
+
+def to_pcm16(samples):
+    """float32 samples -> raw 16 bit little endian pcm bytes"""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def to_wav_bytes(samples):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(to_pcm16(samples))
+    return buf.getvalue()
@@ -0,0 +1,47 @@
+# throughput vs latency of batched whisper inference
+# usage: python bench_asr_batching.py clip1.webm clip2.wav ... --sizes 1,2,4,8 --rounds 3
+# backend and model come from ASR_BACKEND / ASR_MODEL_SIZE like the api
+import argparse
+import time
+
+import asr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark whisper micro batching")
+    parser.add_argument("clips", nargs="+", help="audio files, reused round robin to fill a batch")
+    parser.add_argument("--sizes", default="1,2,4,8", help="comma separated batch sizes")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",")]
+    options = {"fp16": False}
+
+    print(f"loading {asr.ASR_BACKEND} model '{asr.ASR_MODEL_SIZE}'...")
+    asr.get_backend()
+    asr._worker_transcribe_batch(args.clips[:1], options) # warm up
+
+    print(f"\n{'batch':>5} {'latency s':>10} {'clips/s':>10} {'s/clip':>10}")
+    print("-" * 40)
+
+    for size in sizes:
+        batch = [args.clips[i % len(args.clips)] for i in range(size)]
+        latencies = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            asr._worker_transcribe_batch(batch, options)
+            latencies.append(time.perf_counter() - start)
+
+        latency = sum(latencies) / len(latencies)
+        print(f"{size:>5} {latency:>10.2f} {size / latency:>10.2f} {latency / size:>10.2f}")
+
+    # baseline: the non batched path the api used before
+    start = time.perf_counter()
+    for clip in args.clips:
+        asr._worker_transcribe(clip, options)
+    per_clip = (time.perf_counter() - start) / len(args.clips)
+    print(f"\nunbatched transcribe: {per_clip:.2f} s/clip")
+
+
+if __name__ == "__main__":
+    main()
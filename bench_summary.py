@@ -0,0 +1,107 @@
+# template vs llm pnr summaries: latency per language, and a fact check of the template against the llm
+# usage: python bench_summary.py --langs english,hindi --number 2000
+#        python bench_summary.py --llm   (also calls the llm, needs GROQ_API_KEY)
+import argparse
+import re
+import time
+import timeit
+
+from pnr_schema import normalize_pnr
+from pnr_templates import LANG_CODES, render_summary
+
+
+SAMPLES = {
+    "rapidapi": {
+        "success": True,
+        "data": {
+            "pnrNumber": "8426173950",
+            "trainNumber": "12951",
+            "trainName": "MUMBAI RAJDHANI",
+            "dateOfJourney": "Mar 12, 2025 4:35:00 PM",
+            "sourceStation": "BCT",
+            "destinationStation": "NDLS",
+            "boardingPoint": "BCT",
+            "reservationUpto": "NDLS",
+            "journeyClass": "3A",
+            "chartStatus": "Chart Not Prepared",
+            "passengerList": [
+                {"passengerSerialNumber": 1, "bookingStatusDetails": "WL/45", "currentStatusDetails": "WL/12"},
+                {"passengerSerialNumber": 2, "bookingStatusDetails": "WL/46", "currentStatusDetails": "RAC/3"},
+            ],
+        },
+    },
+    "scraper": {
+        "pnr": "2314567890",
+        "train_number": "12301",
+        "train_name": "HOWRAH RAJDHANI",
+        "date_of_journey": "05-04-2025",
+        "from_station": "HWH",
+        "to_station": "NDLS",
+        "class": "2A",
+        "chart_status": "CHART PREPARED",
+        "passengers": [
+            {"serial_number": "1", "booking_status": "CNF/A1/21", "current_status": "CNF/A1/21"},
+        ],
+    },
+}
+
+
+def facts(pnr_data):
+    """what both summaries have to mention: the train number and every waiting list / rac number"""
+    fields = normalize_pnr(pnr_data)
+    needed = [fields["train_number"]]
+    for passenger in fields["passengers"]:
+        needed += re.findall(r"(?:WL|RAC)\D*(\d+)", passenger["current_status"] or "")
+    return needed
+
+
+def missing(summary, needed):
+    # llm output may use local digits, only check the ascii ones it kept
+    return [n for n in needed if n not in summary]
+
+
+def bench_templates(langs, number):
+    print(f"{'sample':<9} {'lang':<10} {'us/summary':>11}  summary")
+    print("-" * 100)
+    for name, pnr_data in SAMPLES.items():
+        for lang in langs:
+            seconds = timeit.timeit(lambda: render_summary(pnr_data, lang), number=number)
+            text = render_summary(pnr_data, lang) or "(needs the llm)"
+            print(f"{name:<9} {lang:<10} {seconds / number * 1e6:>11.1f}  {text[:70]}")
+
+
+def bench_llm(langs):
+    import summary
+    summary.SUMMARY_MODE = "llm"
+
+    print()
+    print(f"{'sample':<9} {'lang':<10} {'template ms':>12} {'llm ms':>8}  facts missing (template / llm)")
+    print("-" * 80)
+    for name, pnr_data in SAMPLES.items():
+        needed = facts(pnr_data)
+        for lang in langs:
+            start = time.perf_counter()
+            templated = render_summary(pnr_data, lang) or ""
+            template_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            generated = summary.generate_pnr_summary(pnr_data, lang)
+            llm_ms = (time.perf_counter() - start) * 1000
+            print(f"{name:<9} {lang:<10} {template_ms:>12.3f} {llm_ms:>8.0f}  "
+                  f"{missing(templated, needed) or '-'} / {missing(generated, needed) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark template vs llm pnr summaries")
+    parser.add_argument("--langs", default=",".join(sorted(set(LANG_CODES.values()))))
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--llm", action="store_true", help="also time the llm and compare the facts")
+    args = parser.parse_args()
+
+    langs = args.langs.split(",")
+    bench_templates(langs, args.number)
+    if args.llm:
+        bench_llm(langs)
+
+
+if __name__ == "__main__":
+    main()
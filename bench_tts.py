@@ -0,0 +1,61 @@
+# tts engine latency / throughput, no cache
+# usage: python bench_tts.py --engines piper,gtts --langs en,hi --concurrency 1,2,4 --rounds 3
+# voices come from PIPER_VOICE_DIR like the api, TTS_WORKERS sets the pool size
+import argparse
+import asyncio
+import time
+
+import tts
+
+
+TEXTS = {
+    "en": "Your PNR 8426173950 is confirmed. Train 12951 Mumbai Rajdhani departs on 12 March. Coach B2, berth 34. Have a safe journey.",
+    "hi": "आपका पीएनआर 8426173950 कन्फर्म है। ट्रेन 12951 मुंबई राजधानी 12 मार्च को रवाना होगी। कोच बी2, बर्थ 34। आपकी यात्रा शुभ हो।",
+}
+
+
+async def one(engine, text, lang):
+    start = time.perf_counter()
+    chunks = await tts.stream_speech(text, lang, engine=engine)
+    first = time.perf_counter() - start
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+    return first, time.perf_counter() - start, size
+
+
+async def run(engine, lang, concurrency, rounds):
+    text = TEXTS.get(lang, TEXTS["en"])
+    results = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results += await asyncio.gather(*(one(engine, text, lang) for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    ttfb = sorted(r[0] for r in results)
+    total = sorted(r[1] for r in results)
+    return ttfb[len(ttfb) // 2], total[len(total) // 2], len(results) / wall, results[0][2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark tts engines")
+    parser.add_argument("--engines", default="piper,gtts")
+    parser.add_argument("--langs", default="en,hi")
+    parser.add_argument("--concurrency", default="1,2,4")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'engine':<8} {'lang':<5} {'conc':>5} {'ttfb p50':>9} {'total p50':>10} {'req/s':>7} {'bytes':>9}")
+    print("-" * 60)
+    for name in args.engines.split(","):
+        engine = tts.get_engine(name)
+        for lang in args.langs.split(","):
+            if not engine.supports(lang):
+                print(f"{name:<8} {lang:<5} no voice")
+                continue
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                ttfb, total, rps, size = asyncio.run(run(engine, lang, concurrency, args.rounds))
+                print(f"{name:<8} {lang:<5} {concurrency:>5} {ttfb:>9.3f} {total:>10.3f} {rps:>7.2f} {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# compare asr backends and decode modes on a fixed clip set: real time factor, peak memory and pnr accuracy
+# usage: python compare_asr.py clips.csv --backends whisper,faster-whisper --modes free,pnr --model small
+# clips.csv has one "path,expected_pnr" per line
+import argparse
+import csv
+import multiprocessing
+import resource
+import subprocess
+import time
+
+from asr_backends import create_backend
+from pnr_text import extract_pnr_from_text
+
+
+def audio_duration(path):
+    proc = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        capture_output=True, text=True, check=True,
+    )
+    return float(proc.stdout.strip())
+
+
+# same options test.py uses for each /speech_to_text mode
+MODES = {
+    "free": {"fp16": False, "word_timestamps": True},
+    "pnr": {"fp16": False, "pnr_mode": True},
+}
+
+
+def digit_accuracy(expected, got):
+    if not got:
+        return 0.0
+    return sum(1 for a, b in zip(expected, got) if a == b) / len(expected)
+
+
+# runs in its own process so peak memory is per backend
+def evaluate(backend_name, model_size, clips, modes):
+    start = time.perf_counter()
+    backend = create_backend(backend_name, model_size)
+    load_time = time.perf_counter() - start
+
+    durations = {path: audio_duration(path) for path, _ in clips}
+    results = []
+
+    for mode in modes:
+        total_audio, total_time = 0.0, 0.0
+        exact, digits, failed = 0, 0.0, 0
+        rows = []
+
+        for path, expected in clips:
+            start = time.perf_counter()
+            result = backend.transcribe(path, **MODES[mode])
+            elapsed = time.perf_counter() - start
+
+            pnr = extract_pnr_from_text(result["text"])
+            total_audio += durations[path]
+            total_time += elapsed
+            exact += pnr == expected
+            failed += pnr is None
+            digits += digit_accuracy(expected, pnr)
+            rows.append((path, expected, pnr, round(elapsed / durations[path], 3), result["text"].strip()))
+
+        results.append({
+            "backend": backend_name,
+            "mode": mode,
+            "load_time": round(load_time, 2),
+            "rtf": round(total_time / total_audio, 3) if total_audio else None,
+            "avg_decode": round(total_time / len(clips), 2),
+            "pnr_exact": round(exact / len(clips), 3),
+            "no_pnr": failed,
+            "digit_accuracy": round(digits / len(clips), 3),
+            "rows": rows,
+        })
+
+    peak = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    for r in results:
+        r["peak_rss_mb"] = peak
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare asr backends")
+    parser.add_argument("manifest", help="csv with path,expected_pnr")
+    parser.add_argument("--backends", default="whisper,faster-whisper")
+    parser.add_argument("--modes", default="free,pnr", help="decode modes to compare, see MODES")
+    parser.add_argument("--model", default="medium")
+    parser.add_argument("--verbose", action="store_true", help="print every clip")
+    args = parser.parse_args()
+
+    with open(args.manifest, newline="", encoding="utf-8") as f:
+        clips = [(row[0].strip(), row[1].strip()) for row in csv.reader(f) if row and not row[0].startswith("#")]
+
+    modes = args.modes.split(",")
+    ctx = multiprocessing.get_context("spawn")
+
+    results = []
+    for name in args.backends.split(","):
+        print(f"running {name} ({args.model}) on {len(clips)} clips, modes {', '.join(modes)}...")
+        with ctx.Pool(1) as pool:
+            results.extend(pool.apply(evaluate, (name, args.model, clips, modes)))
+
+    print(f"\n{'backend':<16} {'mode':<5} {'load s':>7} {'RTF':>7} {'s/clip':>7} {'peak MB':>9} {'pnr exact':>10} {'no pnr':>7} {'digits':>7}")
+    print("-" * 84)
+    for r in results:
+        print(
+            f"{r['backend']:<16} {r['mode']:<5} {r['load_time']:>7} {r['rtf']:>7} {r['avg_decode']:>7} "
+            f"{r['peak_rss_mb']:>9} {r['pnr_exact']:>10} {r['no_pnr']:>7} {r['digit_accuracy']:>7}"
+        )
+
+    if args.verbose:
+        for r in results:
+            print(f"\n{r['backend']} / {r['mode']}")
+            for path, expected, pnr, rtf, text in r["rows"]:
+                mark = "ok " if pnr == expected else "BAD"
+                print(f"  {mark} {path}  expected={expected} got={pnr} rtf={rtf}  '{text}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import threading
+import time
+
+
+class DriverPool:
+    """Keeps a fixed number of warm selenium drivers around so a lookup doesn't
+    pay the chrome cold start every time.
+
+    - drivers are leased per lookup and reset (cookies, storage, about:blank) on release
+    - a driver is health checked before it is handed out
+    - drivers are recycled after `max_uses` lookups, after `max_idle` sec unused, or when they crash"""
+
+    def __init__(self, factory, size=2, max_uses=50, max_idle=600, wait_timeout=30):
+        self.factory = factory # fn that returns a new driver
+        self.size = size
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.wait_timeout = wait_timeout
+
+        self._idle = [] # list of dicts: driver, uses, last_used
+        self._total = 0 # idle + leased
+        self.closed = False # set on shutdown, leased drivers are quit when they come back
+        self._cond = threading.Condition()
+        self._stats = {"hits": 0, "misses": 0, "recycled": 0, "crashed": 0, "waits": 0}
+
+    # launch drivers until the pool is full
+    def warm(self):
+        while True:
+            with self._cond:
+                if self._total >= self.size:
+                    return
+                self._total += 1
+            try:
+                entry = self._new_entry()
+            except Exception as e:
+                print(f"driver pool warm up failed: {str(e)}")
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                return
+            with self._cond:
+                if not self.closed:
+                    self._idle.append(entry)
+                    self._cond.notify()
+                    continue
+            # shut down while this one was starting
+            self._discard(entry)
+            return
+
+    def acquire(self):
+        """Lease a driver, returns the pool entry. Give it back with release()."""
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            with self._cond:
+                if self.closed:
+                    raise Exception("Driver pool is closed")
+                stale = self._reap_idle()
+
+                if self._idle:
+                    entry = self._idle.pop()
+                elif self._total < self.size:
+                    self._total += 1
+                    entry = None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception("No browser available in driver pool")
+                    self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                    continue
+
+            self._quit_all(stale)
+
+            if entry is None:
+                try:
+                    entry = self._new_entry()
+                except Exception:
+                    self._discard(None)
+                    raise
+                with self._cond:
+                    self._stats["misses"] += 1
+                entry["uses"] += 1
+                return entry
+
+            if self._is_healthy(entry["driver"]):
+                with self._cond:
+                    self._stats["hits"] += 1
+                entry["uses"] += 1
+                return entry
+
+            # dead browser, throw it away and try again
+            with self._cond:
+                self._stats["crashed"] += 1
+            self._discard(entry)
+
+    def release(self, entry, broken=False):
+        if entry is None:
+            return
+
+        if self.closed or broken or entry["uses"] >= self.max_uses or not self._reset(entry["driver"]):
+            self._discard(entry)
+            return
+
+        entry["last_used"] = time.monotonic()
+        with self._cond:
+            if not self.closed:
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        # closed while we were resetting it
+        self._discard(entry)
+
+    def close(self):
+        """quit the idle drivers now, leased ones are quit by release()"""
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        self._quit_all(idle)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["leased"] = self._total - len(self._idle)
+        stats["size"] = self.size
+        stats["max_uses"] = self.max_uses
+        stats["max_idle"] = self.max_idle
+        return stats
+
+    # helpers
+
+    def _new_entry(self):
+        return {"driver": self.factory(), "uses": 0, "last_used": time.monotonic()}
+
+    def _discard(self, entry):
+        if entry is not None:
+            self._quit_all([entry])
+        with self._cond:
+            self._total -= 1
+            if entry is not None:
+                self._stats["recycled"] += 1
+            self._cond.notify()
+
+    # must hold self._cond, returns the stale entries so they can be quit outside the lock
+    def _reap_idle(self):
+        now = time.monotonic()
+        stale = [e for e in self._idle if now - e["last_used"] > self.max_idle]
+        if stale:
+            self._idle = [e for e in self._idle if e not in stale]
+            self._total -= len(stale)
+            self._stats["recycled"] += len(stale)
+        return stale
+
+    @staticmethod
+    def _quit_all(entries):
+        for entry in entries:
+            try:
+                entry["driver"].quit()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        # storage has to be cleared while still on the site, about:blank has no storage access
+        try:
+            driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,54 @@
+import threading
+from collections import deque
+
+
+# bucket upper bounds in sec
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+
+class LatencyHistogram:
+    """Bucketed latency counts plus a window of recent samples for percentiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=200):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1) # last one is +inf
+        self._recent = deque(maxlen=window)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._recent.append(seconds)
+            self._count += 1
+            self._sum += seconds
+
+    def percentile(self, p):
+        """p in 0-100 over the recent window, None if nothing observed yet"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            count = self._count
+            total = self._sum
+        labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": count,
+            "avg": round(total / count, 4) if count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": dict(zip(labels, counts)),
+        }
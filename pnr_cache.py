@@ -0,0 +1,167 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """In memory LRU cache with a per entry TTL and a memory budget in bytes.
+
+    Entries are json serializable values, their size is estimated from the json dump.
+    If `db_path` is given, entries are also written to sqlite so they survive a restart.
+    memory=False skips the in memory tier, for values other processes update in the same sqlite file.
+    Every `purge_every` writes the sqlite table drops its expired rows and, with `max_rows`, the oldest ones over the cap."""
+
+    def __init__(self, max_bytes=5 * 1024 * 1024, db_path=None, memory=True, max_rows=None, purge_every=100):
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.memory = memory
+        self.max_rows = max_rows
+        self.purge_every = purge_every
+
+        self._entries = OrderedDict() # key -> (value, size, stored_at, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0, "expired": 0}
+        self._writes = 0 # db writes since the last purge
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT, stored_at REAL, expires_at REAL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """Returns (value, age_in_sec) or None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, stored_at, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value, now - stored_at
+                self._remove(key)
+                self._stats["expired"] += 1
+
+            row = self._db_get(key)
+            if row is not None:
+                value_json, stored_at, expires_at = row
+                if expires_at > now:
+                    value = json.loads(value_json)
+                    if self.memory:
+                        self._put(key, value, len(value_json), stored_at, expires_at)
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return value, now - stored_at
+                self._db_delete(key)
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        value_json = json.dumps(value, separators=(",", ":"))
+
+        with self._lock:
+            if self.memory:
+                self._put(key, value, len(value_json), now, now + ttl)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                        (key, value_json, now, now + ttl)
+                    )
+                    self._writes += 1
+                    if self._writes >= self.purge_every:
+                        self._db_purge(now)
+                    self._db.commit()
+                except Exception as e:
+                    print(f"cache db write failed: {str(e)}")
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+            self._db_delete(key)
+
+    def purge_expired(self):
+        """drop expired entries now instead of when they are next read"""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[3] <= now]:
+                self._remove(key)
+                self._stats["expired"] += 1
+            if self._db is not None:
+                try:
+                    self._db_purge(now)
+                    self._db.commit()
+                except Exception:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        stats["persistent"] = self._db is not None
+        stats["max_rows"] = self.max_rows
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / total, 3) if total else 0.0
+        return stats
+
+    # helpers, all called with self._lock held
+
+    def _put(self, key, value, size, stored_at, expires_at):
+        self._remove(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size, stored_at, expires_at)
+        self._bytes += size
+        # evict least recently used until we are back under budget
+        while self._bytes > self.max_bytes:
+            old_key = next(iter(self._entries))
+            self._remove(old_key)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _db_get(self, key):
+        if self._db is None:
+            return None
+        try:
+            return self._db.execute(
+                "SELECT value, stored_at, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except Exception:
+            return None
+
+    # no commit, the caller commits
+    def _db_purge(self, now):
+        self._writes = 0
+        self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        if self.max_rows:
+            # newest rows win, the rest are whatever a lookup would refetch anyway
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            )
+
+    def _db_delete(self, key):
+        if self._db is None:
+            return
+        try:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._db.commit()
+        except Exception:
+            pass
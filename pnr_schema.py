@@ -0,0 +1,115 @@
+import json
+import threading
+from datetime import datetime
+
+
+# one record shape for every provider: the scraper's ticket_data fields, dates as YYYY-MM-DD when we can read them.
+# this is what pnr_data holds in the api responses and the cache, and what the llm prompt is built from
+#   {"pnr", "train_number", "train_name", "from_station", "to_station", "date_of_journey", "class", "chart_status",
+#    "passengers": [{"serial_number", "booking_status", "current_status", "coach", "berth", "berth_type"}]}
+# coach / berth / berth_type are the provider's own fields when it has them (scraper coach, rapid api currentCoachId...),
+# None otherwise, the status string (CNF/B2/34/LB) usually carries them too
+
+DATE_FORMATS = ("%Y-%m-%d", "%b %d, %Y %I:%M:%S %p", "%b %d, %Y", "%d-%m-%Y", "%d-%b-%Y", "%d %b %Y", "%d/%m/%Y")
+
+_lock = threading.Lock()
+_stats = {"normalized": 0, "tokens_before": 0, "tokens_after": 0}
+
+
+def estimate_tokens(text):
+    # ~4 characters a token, close enough for the llama tokenizer on json / english
+    return len(text) // 4 + 1
+
+
+def parse_date(value):
+    value = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _first(data, *keys):
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _seat(value):
+    # rapid api sends 0 / "" for passengers without a berth (waiting list)
+    value = str(value).strip() if value is not None else ""
+    return value if value and value != "0" else None
+
+
+def normalize_pnr(pnr_data, pnr=None):
+    """Canonical record from a rapid api response ("data" + camelCase), scraper ticket_data or an
+    already canonical record (so it's safe to call twice). None if pnr_data isn't a dict"""
+    if not isinstance(pnr_data, dict):
+        return None
+    data = pnr_data.get("data") if isinstance(pnr_data.get("data"), dict) else pnr_data
+
+    passengers = []
+    for i, p in enumerate(data.get("passengerList") or data.get("passengers") or []):
+        if not isinstance(p, dict):
+            continue
+        serial = str(_first(p, "serial_number", "passengerSerialNumber") or "").strip()
+        passengers.append({
+            "serial_number": int(serial) if serial.isdigit() else i + 1,
+            "booking_status": _first(p, "booking_status", "bookingStatusDetails", "bookingStatus"),
+            "current_status": _first(p, "current_status", "currentStatusDetails", "currentStatus"),
+            "coach": _seat(_first(p, "coach", "currentCoachId")),
+            "berth": _seat(_first(p, "berth", "currentBerthNo")),
+            "berth_type": _seat(_first(p, "berth_type", "currentBerthCode")),
+        })
+
+    date = _first(data, "date_of_journey", "dateOfJourney")
+    parsed = parse_date(date) if date else None
+
+    return {
+        "pnr": str(_first(data, "pnr", "pnrNumber") or pnr or "") or None,
+        "train_number": _first(data, "train_number", "trainNumber"),
+        "train_name": _first(data, "train_name", "trainName"),
+        "from_station": _first(data, "from_station", "sourceStation", "boardingPoint"),
+        "to_station": _first(data, "to_station", "destinationStation", "reservationUpto"),
+        "date_of_journey": parsed.strftime("%Y-%m-%d") if parsed else date,
+        "class": _first(data, "class", "journeyClass"),
+        "chart_status": _first(data, "chart_status", "chartStatus"),
+        "passengers": passengers,
+    }
+
+
+def compact_json(record):
+    """smallest json for the prompt: no whitespace, no empty fields, no pnr (the summary must not say it)"""
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if v not in (None, "", []) and k != "pnr"}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+    return json.dumps(strip(record), separators=(",", ":"), ensure_ascii=False)
+
+
+def normalize_logged(pnr_data, pnr=None):
+    """normalize_pnr for a fresh provider response, logs what the prompt payload shrank by"""
+    record = normalize_pnr(pnr_data, pnr)
+    if record is None:
+        return None
+    before = estimate_tokens(json.dumps(pnr_data, indent=2))
+    after = estimate_tokens(compact_json(record))
+    with _lock:
+        _stats["normalized"] += 1
+        _stats["tokens_before"] += before
+        _stats["tokens_after"] += after
+    print(f"PNR {record['pnr']}: prompt payload ~{before} -> ~{after} tokens")
+    return record
+
+
+def normalize_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["saved_ratio"] = round(1 - stats["tokens_after"] / stats["tokens_before"], 3) if stats["tokens_before"] else 0.0
+    return stats
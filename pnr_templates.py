@@ -0,0 +1,390 @@
+import re
+
+from pnr_schema import normalize_pnr, parse_date
+
+
+# deterministic pnr summaries, phrase tables per language (same languages as test.py's lang_map)
+# render_summary returns None when the ticket is missing fields, the caller then asks the llm
+
+
+STATION_NAMES = {
+    "NDLS": "New Delhi", "DLI": "Old Delhi", "NZM": "Hazrat Nizamuddin", "ANVT": "Anand Vihar Terminal",
+    "BSB": "Varanasi Junction", "BSBS": "Banaras", "DDU": "Pandit Deen Dayal Upadhyaya Junction",
+    "PRYJ": "Prayagraj Junction", "ALD": "Prayagraj Junction", "CNB": "Kanpur Central", "LKO": "Lucknow",
+    "LJN": "Lucknow Junction", "GKP": "Gorakhpur Junction", "AGC": "Agra Cantt", "GWL": "Gwalior Junction",
+    "JHS": "Virangana Lakshmibai Jhansi", "BPL": "Bhopal Junction", "ET": "Itarsi Junction", "JBP": "Jabalpur",
+    "PNBE": "Patna Junction", "RNC": "Ranchi", "HWH": "Howrah Junction", "SDAH": "Sealdah", "KOAA": "Kolkata",
+    "BBS": "Bhubaneswar", "PURI": "Puri", "GHY": "Guwahati", "NJP": "New Jalpaiguri",
+    "BCT": "Mumbai Central", "CSMT": "Mumbai CSMT", "LTT": "Lokmanya Tilak Terminus", "DR": "Dadar",
+    "BDTS": "Bandra Terminus", "PUNE": "Pune Junction", "NGP": "Nagpur", "ADI": "Ahmedabad Junction",
+    "ST": "Surat", "BRC": "Vadodara Junction", "JP": "Jaipur", "JU": "Jodhpur Junction", "AII": "Ajmer Junction",
+    "CDG": "Chandigarh", "ASR": "Amritsar Junction", "JAT": "Jammu Tawi", "SVDK": "Shri Mata Vaishno Devi Katra",
+    "DDN": "Dehradun", "HW": "Haridwar Junction", "MAS": "Chennai Central", "MS": "Chennai Egmore",
+    "SBC": "KSR Bengaluru", "YPR": "Yesvantpur Junction", "SC": "Secunderabad Junction", "HYB": "Hyderabad Deccan",
+    "BZA": "Vijayawada Junction", "VSKP": "Visakhapatnam", "TPTY": "Tirupati", "CBE": "Coimbatore Junction",
+    "MDU": "Madurai Junction", "TVC": "Thiruvananthapuram Central", "ERS": "Ernakulam Junction",
+    "CLT": "Kozhikode", "MAO": "Madgaon", "MAQ": "Mangaluru Central",
+}
+
+CLASS_NAMES = {
+    "1A": "First AC", "2A": "Second AC", "3A": "Third AC", "3E": "Third AC Economy",
+    "SL": "Sleeper", "CC": "AC Chair Car", "EC": "Executive Chair Car", "EA": "Executive Anubhuti",
+    "2S": "Second Sitting", "FC": "First Class", "GN": "General",
+}
+
+# said after the berth number, english like the class names
+BERTH_TYPES = {
+    "LB": "lower berth", "MB": "middle berth", "UB": "upper berth",
+    "SL": "side lower berth", "SM": "side middle berth", "SU": "side upper berth",
+    "WS": "window seat", "MS": "middle seat", "AS": "aisle seat", "CB": "cabin", "CP": "coupe",
+}
+
+MONTHS = {
+    "english": ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"],
+    "hindi": ["जनवरी", "फ़रवरी", "मार्च", "अप्रैल", "मई", "जून", "जुलाई", "अगस्त", "सितंबर", "अक्टूबर", "नवंबर", "दिसंबर"],
+    "urdu": ["جنوری", "فروری", "مارچ", "اپریل", "مئی", "جون", "جولائی", "اگست", "ستمبر", "اکتوبر", "نومبر", "دسمبر"],
+    "punjabi": ["ਜਨਵਰੀ", "ਫ਼ਰਵਰੀ", "ਮਾਰਚ", "ਅਪ੍ਰੈਲ", "ਮਈ", "ਜੂਨ", "ਜੁਲਾਈ", "ਅਗਸਤ", "ਸਤੰਬਰ", "ਅਕਤੂਬਰ", "ਨਵੰਬਰ", "ਦਸੰਬਰ"],
+    "bengali": ["জানুয়ারি", "ফেব্রুয়ারি", "মার্চ", "এপ্রিল", "মে", "জুন", "জুলাই", "আগস্ট", "সেপ্টেম্বর", "অক্টোবর", "নভেম্বর", "ডিসেম্বর"],
+    "telugu": ["జనవరి", "ఫిబ్రవరి", "మార్చి", "ఏప్రిల్", "మే", "జూన్", "జూలై", "ఆగస్టు", "సెప్టెంబర్", "అక్టోబర్", "నవంబర్", "డిసెంబర్"],
+    "marathi": ["जानेवारी", "फेब्रुवारी", "मार्च", "एप्रिल", "मे", "जून", "जुलै", "ऑगस्ट", "सप्टेंबर", "ऑक्टोबर", "नोव्हेंबर", "डिसेंबर"],
+    "tamil": ["ஜனவரி", "பிப்ரவரி", "மார்ச்", "ஏப்ரல்", "மே", "ஜூன்", "ஜூலை", "ஆகஸ்ட்", "செப்டம்பர்", "அக்டோபர்", "நவம்பர்", "டிசம்பர்"],
+    "gujarati": ["જાન્યુઆરી", "ફેબ્રુઆરી", "માર્ચ", "એપ્રિલ", "મે", "જૂન", "જુલાઈ", "ઑગસ્ટ", "સપ્ટેમ્બર", "ઑક્ટોબર", "નવેમ્બર", "ડિસેમ્બર"],
+    "kannada": ["ಜನವರಿ", "ಫೆಬ್ರವರಿ", "ಮಾರ್ಚ್", "ಏಪ್ರಿಲ್", "ಮೇ", "ಜೂನ್", "ಜುಲೈ", "ಆಗಸ್ಟ್", "ಸೆಪ್ಟೆಂಬರ್", "ಅಕ್ಟೋಬರ್", "ನವೆಂಬರ್", "ಡಿಸೆಂಬರ್"],
+    "malayalam": ["ജനുവരി", "ഫെബ്രുവരി", "മാർച്ച്", "ഏപ്രിൽ", "മേയ്", "ജൂൺ", "ജൂലൈ", "ഓഗസ്റ്റ്", "സെപ്റ്റംബർ", "ഒക്ടോബർ", "നവംബർ", "ഡിസംബർ"],
+}
+
+PHRASES = {
+    "english": {
+        "train": "Your train is {name}, number {number}.",
+        "train_number": "Your train number is {number}.",
+        "route": "It runs from {src} to {dst}.",
+        "date": "Journey date is {date}.",
+        "class": "Class is {cls}.",
+        "chart_prepared": "The chart is prepared.",
+        "chart_not_prepared": "The chart is not prepared yet.",
+        "passenger": "Passenger {n}: {status}.",
+        "cnf": "confirmed",
+        "cnf_coach": "confirmed, coach {coach}",
+        "cnf_seat": "confirmed, coach {coach}, berth {berth}",
+        "wl": "waiting list number {num}",
+        "rac": "RAC number {num}",
+        "can": "cancelled",
+        "chance": "Chances of confirmation are {level}.",
+        "high": "high", "medium": "medium", "low": "low",
+        "closing": "Thank you and have a safe journey.",
+    },
+    "hindi": {
+        "train": "आपकी ट्रेन {name} है, नंबर {number}।",
+        "train_number": "आपकी ट्रेन का नंबर {number} है।",
+        "route": "यह {src} से {dst} तक जाती है।",
+        "date": "यात्रा की तारीख {date} है।",
+        "class": "क्लास {cls} है।",
+        "chart_prepared": "चार्ट तैयार हो गया है।",
+        "chart_not_prepared": "चार्ट अभी तैयार नहीं हुआ है।",
+        "passenger": "यात्री {n}: {status}।",
+        "cnf": "कन्फर्म",
+        "cnf_coach": "कन्फर्म, कोच {coach}",
+        "cnf_seat": "कन्फर्म, कोच {coach}, बर्थ {berth}",
+        "wl": "वेटिंग लिस्ट नंबर {num}",
+        "rac": "आरएसी नंबर {num}",
+        "can": "कैंसल",
+        "chance": "कन्फर्म होने की संभावना {level} है।",
+        "high": "अधिक", "medium": "मध्यम", "low": "कम",
+        "closing": "धन्यवाद, आपकी यात्रा शुभ हो।",
+    },
+    "urdu": {
+        "train": "آپ کی ٹرین {name} ہے، نمبر {number}۔",
+        "train_number": "آپ کی ٹرین کا نمبر {number} ہے۔",
+        "route": "یہ {src} سے {dst} تک جاتی ہے۔",
+        "date": "سفر کی تاریخ {date} ہے۔",
+        "class": "کلاس {cls} ہے۔",
+        "chart_prepared": "چارٹ تیار ہو گیا ہے۔",
+        "chart_not_prepared": "چارٹ ابھی تیار نہیں ہوا ہے۔",
+        "passenger": "مسافر {n}: {status}۔",
+        "cnf": "کنفرم",
+        "cnf_coach": "کنفرم، کوچ {coach}",
+        "cnf_seat": "کنفرم، کوچ {coach}، برتھ {berth}",
+        "wl": "ویٹنگ لسٹ نمبر {num}",
+        "rac": "آر اے سی نمبر {num}",
+        "can": "منسوخ",
+        "chance": "کنفرم ہونے کا امکان {level} ہے۔",
+        "high": "زیادہ", "medium": "درمیانہ", "low": "کم",
+        "closing": "شکریہ، آپ کا سفر بخیر ہو۔",
+    },
+    "punjabi": {
+        "train": "ਤੁਹਾਡੀ ਰੇਲਗੱਡੀ {name} ਹੈ, ਨੰਬਰ {number}।",
+        "train_number": "ਤੁਹਾਡੀ ਰੇਲਗੱਡੀ ਦਾ ਨੰਬਰ {number} ਹੈ।",
+        "route": "ਇਹ {src} ਤੋਂ {dst} ਤੱਕ ਜਾਂਦੀ ਹੈ।",
+        "date": "ਯਾਤਰਾ ਦੀ ਤਾਰੀਖ {date} ਹੈ।",
+        "class": "ਕਲਾਸ {cls} ਹੈ।",
+        "chart_prepared": "ਚਾਰਟ ਤਿਆਰ ਹੋ ਗਿਆ ਹੈ।",
+        "chart_not_prepared": "ਚਾਰਟ ਅਜੇ ਤਿਆਰ ਨਹੀਂ ਹੋਇਆ।",
+        "passenger": "ਯਾਤਰੀ {n}: {status}।",
+        "cnf": "ਕਨਫਰਮ",
+        "cnf_coach": "ਕਨਫਰਮ, ਕੋਚ {coach}",
+        "cnf_seat": "ਕਨਫਰਮ, ਕੋਚ {coach}, ਬਰਥ {berth}",
+        "wl": "ਵੇਟਿੰਗ ਲਿਸਟ ਨੰਬਰ {num}",
+        "rac": "ਆਰਏਸੀ ਨੰਬਰ {num}",
+        "can": "ਰੱਦ",
+        "chance": "ਕਨਫਰਮ ਹੋਣ ਦੀ ਸੰਭਾਵਨਾ {level} ਹੈ।",
+        "high": "ਵੱਧ", "medium": "ਦਰਮਿਆਨੀ", "low": "ਘੱਟ",
+        "closing": "ਧੰਨਵਾਦ, ਤੁਹਾਡੀ ਯਾਤਰਾ ਸੁਖਦ ਹੋਵੇ।",
+    },
+    "bengali": {
+        "train": "আপনার ট্রেন {name}, নম্বর {number}।",
+        "train_number": "আপনার ট্রেনের নম্বর {number}।",
+        "route": "ট্রেনটি {src} থেকে {dst} পর্যন্ত যাবে।",
+        "date": "যাত্রার তারিখ {date}।",
+        "class": "ক্লাস {cls}।",
+        "chart_prepared": "চার্ট তৈরি হয়ে গেছে।",
+        "chart_not_prepared": "চার্ট এখনও তৈরি হয়নি।",
+        "passenger": "যাত্রী {n}: {status}।",
+        "cnf": "কনফার্মড",
+        "cnf_coach": "কনফার্মড, কোচ {coach}",
+        "cnf_seat": "কনফার্মড, কোচ {coach}, বার্থ {berth}",
+        "wl": "ওয়েটিং লিস্ট নম্বর {num}",
+        "rac": "আরএসি নম্বর {num}",
+        "can": "বাতিল",
+        "chance": "কনফার্ম হওয়ার সম্ভাবনা {level}।",
+        "high": "বেশি", "medium": "মাঝারি", "low": "কম",
+        "closing": "ধন্যবাদ, আপনার যাত্রা শুভ হোক।",
+    },
+    "telugu": {
+        "train": "మీ రైలు {name}, నంబర్ {number}.",
+        "train_number": "మీ రైలు నంబర్ {number}.",
+        "route": "ఇది {src} నుండి {dst} వరకు వెళ్తుంది.",
+        "date": "ప్రయాణ తేదీ {date}.",
+        "class": "క్లాస్ {cls}.",
+        "chart_prepared": "చార్ట్ సిద్ధమైంది.",
+        "chart_not_prepared": "చార్ట్ ఇంకా సిద్ధం కాలేదు.",
+        "passenger": "ప్రయాణికుడు {n}: {status}.",
+        "cnf": "కన్ఫర్మ్",
+        "cnf_coach": "కన్ఫర్మ్, కోచ్ {coach}",
+        "cnf_seat": "కన్ఫర్మ్, కోచ్ {coach}, బెర్త్ {berth}",
+        "wl": "వెయిటింగ్ లిస్ట్ నంబర్ {num}",
+        "rac": "ఆర్ఏసీ నంబర్ {num}",
+        "can": "రద్దు",
+        "chance": "కన్ఫర్మ్ అయ్యే అవకాశం {level}.",
+        "high": "ఎక్కువ", "medium": "మధ్యస్థం", "low": "తక్కువ",
+        "closing": "ధన్యవాదాలు, మీ ప్రయాణం సురక్షితంగా సాగాలి.",
+    },
+    "marathi": {
+        "train": "तुमची ट्रेन {name} आहे, नंबर {number}.",
+        "train_number": "तुमच्या ट्रेनचा नंबर {number} आहे.",
+        "route": "ही ट्रेन {src} ते {dst} जाते.",
+        "date": "प्रवासाची तारीख {date} आहे.",
+        "class": "क्लास {cls} आहे.",
+        "chart_prepared": "चार्ट तयार झाला आहे.",
+        "chart_not_prepared": "चार्ट अजून तयार झालेला नाही.",
+        "passenger": "प्रवासी {n}: {status}.",
+        "cnf": "कन्फर्म",
+        "cnf_coach": "कन्फर्म, कोच {coach}",
+        "cnf_seat": "कन्फर्म, कोच {coach}, बर्थ {berth}",
+        "wl": "वेटिंग लिस्ट नंबर {num}",
+        "rac": "आरएसी नंबर {num}",
+        "can": "रद्द",
+        "chance": "कन्फर्म होण्याची शक्यता {level} आहे.",
+        "high": "जास्त", "medium": "मध्यम", "low": "कमी",
+        "closing": "धन्यवाद, तुमचा प्रवास सुखाचा होवो.",
+    },
+    "tamil": {
+        "train": "உங்கள் ரயில் {name}, எண் {number}.",
+        "train_number": "உங்கள் ரயில் எண் {number}.",
+        "route": "இது {src} முதல் {dst} வரை செல்கிறது.",
+        "date": "பயண தேதி {date}.",
+        "class": "வகுப்பு {cls}.",
+        "chart_prepared": "சார்ட் தயாராகிவிட்டது.",
+        "chart_not_prepared": "சார்ட் இன்னும் தயாராகவில்லை.",
+        "passenger": "பயணி {n}: {status}.",
+        "cnf": "உறுதி செய்யப்பட்டது",
+        "cnf_coach": "உறுதி செய்யப்பட்டது, கோச் {coach}",
+        "cnf_seat": "உறுதி செய்யப்பட்டது, கோச் {coach}, பெர்த் {berth}",
+        "wl": "காத்திருப்போர் பட்டியல் எண் {num}",
+        "rac": "ஆர்ஏசி எண் {num}",
+        "can": "ரத்து செய்யப்பட்டது",
+        "chance": "உறுதியாகும் வாய்ப்பு {level}.",
+        "high": "அதிகம்", "medium": "நடுத்தரம்", "low": "குறைவு",
+        "closing": "நன்றி, உங்கள் பயணம் இனிதாக அமையட்டும்.",
+    },
+    "gujarati": {
+        "train": "તમારી ટ્રેન {name} છે, નંબર {number}.",
+        "train_number": "તમારી ટ્રેનનો નંબર {number} છે.",
+        "route": "આ ટ્રેન {src} થી {dst} સુધી જાય છે.",
+        "date": "મુસાફરીની તારીખ {date} છે.",
+        "class": "ક્લાસ {cls} છે.",
+        "chart_prepared": "ચાર્ટ તૈયાર થઈ ગયો છે.",
+        "chart_not_prepared": "ચાર્ટ હજી તૈયાર થયો નથી.",
+        "passenger": "મુસાફર {n}: {status}.",
+        "cnf": "કન્ફર્મ",
+        "cnf_coach": "કન્ફર્મ, કોચ {coach}",
+        "cnf_seat": "કન્ફર્મ, કોચ {coach}, બર્થ {berth}",
+        "wl": "વેઇટિંગ લિસ્ટ નંબર {num}",
+        "rac": "આરએસી નંબર {num}",
+        "can": "રદ",
+        "chance": "કન્ફર્મ થવાની શક્યતા {level} છે.",
+        "high": "વધુ", "medium": "મધ્યમ", "low": "ઓછી",
+        "closing": "આભાર, તમારી યાત્રા શુભ રહે.",
+    },
+    "kannada": {
+        "train": "ನಿಮ್ಮ ರೈಲು {name}, ಸಂಖ್ಯೆ {number}.",
+        "train_number": "ನಿಮ್ಮ ರೈಲಿನ ಸಂಖ್ಯೆ {number}.",
+        "route": "ಇದು {src} ಇಂದ {dst} ವರೆಗೆ ಹೋಗುತ್ತದೆ.",
+        "date": "ಪ್ರಯಾಣದ ದಿನಾಂಕ {date}.",
+        "class": "ಕ್ಲಾಸ್ {cls}.",
+        "chart_prepared": "ಚಾರ್ಟ್ ಸಿದ್ಧವಾಗಿದೆ.",
+        "chart_not_prepared": "ಚಾರ್ಟ್ ಇನ್ನೂ ಸಿದ್ಧವಾಗಿಲ್ಲ.",
+        "passenger": "ಪ್ರಯಾಣಿಕ {n}: {status}.",
+        "cnf": "ಕನ್ಫರ್ಮ್",
+        "cnf_coach": "ಕನ್ಫರ್ಮ್, ಕೋಚ್ {coach}",
+        "cnf_seat": "ಕನ್ಫರ್ಮ್, ಕೋಚ್ {coach}, ಬರ್ತ್ {berth}",
+        "wl": "ವೇಟಿಂಗ್ ಲಿಸ್ಟ್ ಸಂಖ್ಯೆ {num}",
+        "rac": "ಆರ್‌ಎಸಿ ಸಂಖ್ಯೆ {num}",
+        "can": "ರದ್ದು",
+        "chance": "ಕನ್ಫರ್ಮ್ ಆಗುವ ಸಾಧ್ಯತೆ {level}.",
+        "high": "ಹೆಚ್ಚು", "medium": "ಮಧ್ಯಮ", "low": "ಕಡಿಮೆ",
+        "closing": "ಧನ್ಯವಾದಗಳು, ನಿಮ್ಮ ಪ್ರಯಾಣ ಸುಖಕರವಾಗಿರಲಿ.",
+    },
+    "malayalam": {
+        "train": "നിങ്ങളുടെ ട്രെയിൻ {name}, നമ്പർ {number}.",
+        "train_number": "നിങ്ങളുടെ ട്രെയിൻ നമ്പർ {number}.",
+        "route": "ഇത് {src} മുതൽ {dst} വരെ പോകുന്നു.",
+        "date": "യാത്രാ തീയതി {date}.",
+        "class": "ക്ലാസ് {cls}.",
+        "chart_prepared": "ചാർട്ട് തയ്യാറായി.",
+        "chart_not_prepared": "ചാർട്ട് ഇതുവരെ തയ്യാറായിട്ടില്ല.",
+        "passenger": "യാത്രക്കാരൻ {n}: {status}.",
+        "cnf": "കൺഫേം",
+        "cnf_coach": "കൺഫേം, കോച്ച് {coach}",
+        "cnf_seat": "കൺഫേം, കോച്ച് {coach}, ബെർത്ത് {berth}",
+        "wl": "വെയിറ്റിംഗ് ലിസ്റ്റ് നമ്പർ {num}",
+        "rac": "ആർഎസി നമ്പർ {num}",
+        "can": "റദ്ദാക്കി",
+        "chance": "കൺഫേം ആകാനുള്ള സാധ്യത {level}.",
+        "high": "കൂടുതൽ", "medium": "ഇടത്തരം", "low": "കുറവ്",
+        "closing": "നന്ദി, നിങ്ങളുടെ യാത്ര സുഖകരമാകട്ടെ.",
+    },
+}
+
+# the summary endpoints get language names, scripts sometimes pass codes
+LANG_CODES = {
+    "en": "english", "hi": "hindi", "ur": "urdu", "pa": "punjabi", "bn": "bengali", "te": "telugu",
+    "mr": "marathi", "ta": "tamil", "gu": "gujarati", "kn": "kannada", "ml": "malayalam",
+}
+
+# CNF/B2/34/LB, CNF B2 34, GNWL/23, RLWL 12, RAC/14, CAN, ...
+STATUS_RE = re.compile(r"^\s*(CNF|CONFIRMED|RAC|[A-Z]*WL|CAN|CANCELLED)\b\W*(.*)$", re.IGNORECASE)
+
+
+def parse_status(text):
+    """booking status string -> {"kind": cnf|wl|rac|can, "coach", "berth", "berth_type", "num"} or None"""
+    match = STATUS_RE.match(str(text or ""))
+    if not match:
+        return None
+    code, rest = match.group(1).upper(), [p for p in re.split(r"[\s/,-]+", match.group(2)) if p]
+
+    if code in ("CAN", "CANCELLED"):
+        return {"kind": "can"}
+    if code in ("CNF", "CONFIRMED"):
+        coach = rest[0] if rest and not rest[0].isdigit() else None
+        berth = next((p for p in rest if p.isdigit()), None)
+        berth_type = next((p.upper() for p in rest if p.upper() in BERTH_TYPES), None)
+        return {"kind": "cnf", "coach": coach, "berth": berth, "berth_type": berth_type}
+    num = next((p for p in rest if p.isdigit()), None)
+    if num is None:
+        return None
+    return {"kind": "rac" if code == "RAC" else "wl", "num": int(num)}
+
+
+def station_name(code):
+    code = str(code).strip()
+    return STATION_NAMES.get(code.upper(), code)
+
+
+def class_name(code):
+    code = str(code).strip()
+    return CLASS_NAMES.get(code.upper(), code)
+
+
+def format_date(value, lang):
+    date = parse_date(value)
+    if date is None:
+        return str(value).strip()
+    return f"{date.day} {MONTHS[lang][date.month - 1]} {date.year}"
+
+
+# rough odds for the worst non confirmed passenger, only said while the chart is not prepared
+def confirmation_chance(statuses):
+    waiting = [s for s in statuses if s["kind"] in ("wl", "rac")]
+    if not waiting:
+        return None
+    if all(s["kind"] == "rac" for s in waiting):
+        return "high"
+    worst = max(s["num"] for s in waiting if s["kind"] == "wl")
+    if worst <= 10:
+        return "high"
+    if worst <= 30:
+        return "medium"
+    return "low"
+
+
+def render_summary(pnr_data, lang="english"):
+    """Spoken summary from the phrase tables, None if a needed field is missing or unreadable
+    (train number, stations, passengers with a known status) so the caller can fall back to the llm"""
+    lang = str(lang or "english").lower()
+    lang = LANG_CODES.get(lang, lang)
+    phrases = PHRASES.get(lang)
+    fields = normalize_pnr(pnr_data)
+    if phrases is None or fields is None:
+        return None
+    if not fields["train_number"] or not fields["from_station"] or not fields["to_station"]:
+        return None
+    if not fields["passengers"]:
+        return None
+
+    statuses = [parse_status(p["current_status"]) for p in fields["passengers"]]
+    if any(s is None for s in statuses):
+        return None
+
+    sentences = []
+    if fields["train_name"]:
+        sentences.append(phrases["train"].format(name=str(fields["train_name"]).strip().title(), number=fields["train_number"]))
+    else:
+        sentences.append(phrases["train_number"].format(number=fields["train_number"]))
+
+    sentences.append(phrases["route"].format(src=station_name(fields["from_station"]), dst=station_name(fields["to_station"])))
+    if fields["date_of_journey"]:
+        sentences.append(phrases["date"].format(date=format_date(fields["date_of_journey"], lang)))
+    if fields["class"]:
+        sentences.append(phrases["class"].format(cls=class_name(fields["class"])))
+
+    chart = str(fields["chart_status"] or "").lower()
+    chart_prepared = None
+    if "prepared" in chart:
+        chart_prepared = "not" not in chart
+        sentences.append(phrases["chart_prepared" if chart_prepared else "chart_not_prepared"])
+
+    for passenger, status in zip(fields["passengers"], statuses):
+        if status["kind"] == "cnf":
+            # the status string first, the provider's separate seat fields fill the gaps
+            coach = status["coach"] or passenger["coach"]
+            berth = status["berth"] or passenger["berth"]
+            berth_type = BERTH_TYPES.get(str(status["berth_type"] or passenger["berth_type"] or "").upper())
+            if coach and berth:
+                text = phrases["cnf_seat"].format(coach=coach, berth=f"{berth}, {berth_type}" if berth_type else berth)
+            elif coach:
+                text = phrases["cnf_coach"].format(coach=coach)
+            else:
+                text = phrases["cnf"]
+        elif status["kind"] == "can":
+            text = phrases["can"]
+        else:
+            text = phrases[status["kind"]].format(num=status["num"])
+        sentences.append(phrases["passenger"].format(n=passenger["serial_number"], status=text))
+
+    if chart_prepared is not True:
+        chance = confirmation_chance(statuses)
+        if chance:
+            sentences.append(phrases["chance"].format(level=phrases[chance]))
+
+    sentences.append(phrases["closing"])
+    return " ".join(sentences)
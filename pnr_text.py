@@ -0,0 +1,204 @@
+import re
+
+
+#  digit mapping for major Indian languages
+DIGIT_MAPPINGS = {
+    # Hindi/Urdu
+    'शून्य': '0', 'shuny': '0', 'shunya': '0',
+    'एक': '1', 'ek': '1',
+    'दो': '2', 'do': '2',
+    'तीन': '3', 'teen': '3', 'tin': '3',
+    'चार': '4', 'char': '4', 'chaar': '4',
+    'पांच': '5', 'paanch': '5', 'panch': '5', 'punch': '5',
+    'छह': '6', 'chhah': '6', 'chha': '6', 'chhe': '6',
+    'सात': '7', 'saat': '7', 'sat': '7',
+    'आठ': '8', 'aath': '8', 'ath': '8',
+    'नौ': '9', 'nau': '9', 'no': '9',
+   
+    # English
+    'zero': '0',
+    'one': '1',
+    'two': '2',
+    'three': '3',
+    'four': '4',
+    'five': '5',
+    'six': '6',
+    'seven': '7',
+    'eight': '8',
+    'nine': '9',
+   
+    # Bengali
+    'শূন্য': '0', 'shunno': '0',
+    'এক': '1', 'æk': '1',
+    'দুই': '2', 'dui': '2',
+    'তিন': '3', 'tin': '3',
+    'চার': '4', 'char': '4',
+    'পাঁচ': '5', 'pãch': '5',
+    'ছয়': '6', 'choy': '6',
+    'সাত': '7', 'sat': '7',
+    'আট': '8', 'at': '8', 'aat': '8',
+    'নয়': '9', 'noy': '9',
+   
+    # Tamil
+    'பூஜ்ஜியம்': '0', 'poojiyam': '0',
+    'ஒன்று': '1', 'onru': '1', 'ondru': '1',
+    'இரண்டு': '2', 'irandu': '2',
+    'மூன்று': '3', 'moondru': '3', 'munru': '3',
+    'நான்கு': '4', 'naangu': '4', 'nanku': '4',
+    'ஐந்து': '5', 'ainthu': '5',
+    'ஆறு': '6', 'aaru': '6',
+    'ஏழு': '7', 'ezhu': '7',
+    'எட்டு': '8', 'ettu': '8',
+    'ஒன்பது': '9', 'onbathu': '9',
+   
+    # Telugu
+    'సున్న': '0', 'sunna': '0',
+    'ఒకటి': '1', 'okati': '1',
+    'రెండు': '2', 'rendu': '2',
+    'మూడు': '3', 'moodu': '3',
+    'నాలుగు': '4', 'naalugu': '4',
+    'ఐదు': '5', 'aidu': '5',
+    'ఆరు': '6', 'aaru': '6',
+    'ఏడు': '7', 'edu': '7', 'yedu': '7',
+    'ఎనిమిది': '8', 'enimidi': '8',
+    'తొమ్మిది': '9', 'tommidi': '9',
+   
+    # Marathi
+    'शून्य': '0',
+    'एक': '1',
+    'दोन': '2', 'don': '2',
+    'तीन': '3',
+    'चार': '4',
+    'पाच': '5', 'paach': '5',
+    'सहा': '6', 'saha': '6',
+    'सात': '7',
+    'आठ': '8',
+    'नऊ': '9', 'nau': '9',
+   
+    # Gujarati
+    'શૂન્ય': '0',
+    'એક': '1',
+    'બે': '2', 'be': '2',
+    'ત્રણ': '3', 'tran': '3',
+    'ચાર': '4',
+    'પાંચ': '5',
+    'છ': '6', 'chha': '6',
+    'સાત': '7',
+    'આઠ': '8',
+    'નવ': '9', 'nav': '9',
+   
+    # Kannada
+    'ಸೊನ್ನೆ': '0', 'sonne': '0',
+    'ಒಂದು': '1', 'ondu': '1',
+    'ಎರಡು': '2', 'eradu': '2',
+    'ಮೂರು': '3', 'mooru': '3',
+    'ನಾಲ್ಕು': '4', 'naalku': '4',
+    'ಐದು': '5', 'aidu': '5',
+    'ಆರು': '6', 'aaru': '6',
+    'ಏಳು': '7', 'elu': '7',
+    'ಎಂಟು': '8', 'entu': '8',
+    'ಒಂಬತ್ತು': '9', 'ombattu': '9',
+   
+    # Malayalam
+    'പൂജ്യം': '0', 'poojyam': '0',
+    'ഒന്ന്': '1', 'onnu': '1',
+    'രണ്ട്': '2', 'randu': '2',
+    'മൂന്ന്': '3', 'moonnu': '3',
+    'നാല്': '4', 'naalu': '4',
+    'അഞ്ച്': '5', 'anchu': '5',
+    'ആറ്': '6', 'aaru': '6',
+    'ഏഴ്': '7', 'ezhu': '7',
+    'എട്ട്': '8', 'ettu': '8',
+    'ഒമ്പത്': '9', 'ombathu': '9',
+   
+    # Punjabi
+    'ਸਿਫ਼ਰ': '0', 'sifar': '0',
+    'ਇੱਕ': '1', 'ikk': '1',
+    'ਦੋ': '2',
+    'ਤਿੰਨ': '3', 'tinn': '3',
+    'ਚਾਰ': '4',
+    'ਪੰਜ': '5', 'panj': '5',
+    'ਛੇ': '6', 'chhe': '6',
+    'ਸੱਤ': '7', 'satt': '7',
+    'ਅੱਠ': '8', 'atth': '8',
+    'ਨੌਂ': '9', 'naun': '9',
+}
+
+# mapping for faster lookup
+DIGIT_MAPPING_LOWER = {k.lower(): v for k, v in DIGIT_MAPPINGS.items()}
+
+# decoder prompts for pnr mode (keyed by whisper language code), they prime the model to write numerals.
+# the example has less than 10 digits on purpose so a copied prompt can't turn into a fake pnr
+PNR_PROMPTS = {
+    'en': "My PNR number is 8, 4, 2, 6.",
+    'hi': "मेरा पीएनआर नंबर 8, 4, 2, 6 है।",
+    'ur': "میرا پی این آر نمبر 8, 4, 2, 6 ہے۔",
+    'pa': "ਮੇਰਾ ਪੀਐਨਆਰ ਨੰਬਰ 8, 4, 2, 6 ਹੈ।",
+    'bn': "আমার পিএনআর নম্বর 8, 4, 2, 6।",
+    'te': "నా పిఎన్ఆర్ నంబర్ 8, 4, 2, 6.",
+    'mr': "माझा पीएनआर नंबर 8, 4, 2, 6 आहे.",
+    'ta': "என் பிஎன்ஆர் எண் 8, 4, 2, 6.",
+    'gu': "મારો પીએનઆર નંબર 8, 4, 2, 6 છે.",
+    'kn': "ನನ್ನ ಪಿಎನ್ಆರ್ ಸಂಖ್ಯೆ 8, 4, 2, 6.",
+    'ml': "എന്റെ പിഎൻആർ നമ്പർ 8, 4, 2, 6 ആണ്.",
+}
+
+# words that may show up around the digits in a pnr utterance, kept when suppressing other tokens
+PNR_CONTEXT_WORDS = ['pnr', 'number', 'my', 'is', 'नंबर', 'पीएनआर', 'मेरा', 'है']
+
+
+def convert_spoken_digits_to_numbers(text):
+    """
+    Convert spoken digits in any language to numeric digits.
+    Handles mixed language scenarios.
+    """
+    # Split text into words
+    words = text.split()
+    converted_words = []
+   
+    for word in words:
+        # remove punctuation but keep the word)
+        cleaned_word = re.sub(r'[^\w\s]', '', word)
+       
+        # Check if this word is a digit word in any language
+        digit = DIGIT_MAPPING_LOWER.get(cleaned_word.lower())
+       
+        if digit:
+            converted_words.append(digit)
+        else:
+            # Keep original word if not a digit
+            converted_words.append(word)
+   
+    return ' '.join(converted_words)
+
+
+
+#extract PNR from the text
+def extract_pnr_from_text(text):
+    
+    # Convert spoken digits to numeric digits
+    text_with_digits = convert_spoken_digits_to_numbers(text)
+   
+    # lower text
+    text_normalized = text_with_digits.lower()
+   
+    # Remove filler words
+    fillers = ['pause', 'wait', 'uh', 'um', 'है', 'ha', 'hain', 'ka', 'ki', 'ke']
+    for filler in fillers:
+        text_normalized = text_normalized.replace(filler, ' ')
+   
+    # Extract all digit sequences
+    digit_sequences = re.findall(r'\d+', text_normalized)
+   
+    # Try 1: Find any 10-digit sequence
+    for seq in digit_sequences:
+        if len(seq) == 10:
+            return seq
+   
+    # Try 2: Combine consecutive digit groups to form 10 digits
+    all_digits = ''.join(digit_sequences)
+    if len(all_digits) >= 10:
+        # Take first 10 digits
+        return all_digits[:10]
+   
+    return None
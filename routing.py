@@ -0,0 +1,189 @@
+import math
+import threading
+import time
+
+from metrics import LatencyHistogram
+
+
+class _NotFound:
+    """what a provider returns when upstream answered fine but doesn't know the pnr (invalid / flushed).
+    falsy like a miss, but the provider is healthy and there's no point asking the next one"""
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "NOT_FOUND"
+
+
+NOT_FOUND = _NotFound()
+
+
+def answered(result):
+    # data or a definite not found, either way the provider did its job
+    return bool(result) or result is NOT_FOUND
+
+
+class CircuitBreaker:
+    """closed -> (N failures in a row) -> open -> (after reset_timeout) -> half_open -> one trial call
+    trial ok -> closed, trial fails -> open again"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            # half open: let exactly one call through
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    # call was allowed but never finished (cancelled), let the next one try
+    def release_trial(self):
+        with self._lock:
+            self._trial_running = False
+
+    def status(self):
+        with self._lock:
+            status = {"state": self.state, "failures": self.failures}
+            if self.state == self.OPEN:
+                status["retry_in"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+        return status
+
+
+class Provider:
+    """A pnr source: fn(pnr_number) -> data, NOT_FOUND or None, plus its breaker and recent outcomes"""
+
+    def __init__(self, name, fn, failure_threshold=3, reset_timeout=30, recovery_time=60):
+        self.name = name
+        self.fn = fn
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram()
+        self.success_rate = 1.0 # moving average, new providers start optimistic
+        self.recovery_time = recovery_time
+        self.last_call = None
+        self.calls = 0
+        self.skipped = 0
+
+    def effective_success_rate(self):
+        # a provider that lost its rank gets no calls, so its score drifts back up
+        # over recovery_time (half life) and it gets tried first again eventually
+        if self.last_call is None:
+            return self.success_rate
+        idle = time.monotonic() - self.last_call
+        recovered = 1 - math.exp(-idle * math.log(2) / self.recovery_time)
+        return self.success_rate + (1 - self.success_rate) * recovered
+
+    def record(self, ok, seconds, alpha=0.2):
+        self.calls += 1
+        self.last_call = time.monotonic()
+        self.latency.observe(seconds)
+        self.success_rate = (1 - alpha) * self.success_rate + alpha * (1.0 if ok else 0.0)
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def status(self):
+        return {
+            "breaker": self.breaker.status(),
+            "success_rate": round(self.effective_success_rate(), 3),
+            "p50_latency": self.latency.percentile(50),
+            "calls": self.calls,
+            "skipped": self.skipped,
+        }
+
+
+class ProviderRouter:
+    """Tries providers best first (success rate, then latency), skipping any whose breaker is open"""
+
+    def __init__(self):
+        self.providers = []
+
+    def register(self, name, fn, **kwargs):
+        self.providers.append(Provider(name, fn, **kwargs))
+
+    def get(self, name):
+        for provider in self.providers:
+            if provider.name == name:
+                return provider
+        return None
+
+    def ordered(self):
+        # success rate rounded to 0.1 so small noise doesn't flip the order, then latency.
+        # a provider without latency data yet goes after the ones we have measured (an untried scraper
+        # must not jump ahead of a working api), ties keep their registration order
+        def key(item):
+            index, provider = item
+            p50 = provider.latency.percentile(50)
+            return (-round(provider.effective_success_rate(), 1), p50 if p50 is not None else float("inf"), index)
+        return [provider for _, provider in sorted(enumerate(self.providers), key=key)]
+
+    def call(self, provider, pnr_number, cancel_event=None):
+        """Run one provider and record the outcome, returns data, NOT_FOUND or None.
+        cancel_event is passed on to the provider, a cancelled call is not counted as a failure"""
+        kwargs = {"cancel_event": cancel_event} if cancel_event is not None else {}
+        start = time.monotonic()
+        try:
+            result = provider.fn(pnr_number, **kwargs)
+        except Exception as e:
+            print(f" provider {provider.name} raised: {str(e)}")
+            result = None
+        if not answered(result) and cancel_event is not None and cancel_event.is_set():
+            provider.breaker.release_trial()
+            return None
+        provider.record(answered(result), time.monotonic() - start)
+        return result
+
+    def fetch(self, pnr_number):
+        """Returns (data, provider_name) from the first provider that answers, or (None, None).
+        A NOT_FOUND answer ends the search too, the other providers read the same upstream"""
+        for provider in self.ordered():
+            if not provider.breaker.allow():
+                provider.skipped += 1
+                print(f" skipping {provider.name}, circuit open")
+                continue
+
+            print(f"\nTrying {provider.name}")
+            print("-"*70)
+            result = self.call(provider, pnr_number)
+            if answered(result):
+                return result, provider.name
+
+        return None, None
+
+    def status(self):
+        return {provider.name: provider.status() for provider in self.providers}
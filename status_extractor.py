@@ -1,39 +1,194 @@
 import requests
+from requests.adapters import HTTPAdapter
+from email.utils import parsedate_to_datetime
 import json
 from selenium import webdriver # launch and control browser  
 from selenium.webdriver.common.by import By # to locate element in page we use by
 from selenium.webdriver.support.ui import WebDriverWait # hepls ot wait untill a condition happens on a page
-from selenium.webdriver.support import expected_conditions as EC # provide condition to wait for 
 from selenium.webdriver.chrome.service import Service # config. chrome service
 from selenium.webdriver.chrome.options import Options # helps to setup the chrome browser options
 from webdriver_manager.chrome import ChromeDriverManager # download and manage correct version of chrome driver
 import time
 import random
+import re
+import asyncio
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 import os
 import json
 
+from driver_pool import DriverPool
+from pnr_cache import TTLCache
+from pnr_schema import normalize_pnr, normalize_logged
+from metrics import LatencyHistogram
+from routing import NOT_FOUND, ProviderRouter, answered
+from summary import generate_pnr_summary # llm summary lives in summary.py, kept importable from here
+
 load_dotenv()
-model_key = os.getenv("GROQ_API_KEY")
-model = ChatGroq(model="llama-3.3-70b-versatile", api_key=model_key)
 
 rapid_api_key = os.getenv("RAPID_API_KEY")
+RAPIDAPI_HOST = "irctc-indian-railway-pnr-status.p.rapidapi.com"
+
+# rapid api http client settings
+RAPIDAPI_CONNECT_TIMEOUT = float(os.getenv("RAPIDAPI_CONNECT_TIMEOUT", "3"))
+RAPIDAPI_READ_TIMEOUT = float(os.getenv("RAPIDAPI_READ_TIMEOUT", "8"))
+RAPIDAPI_MAX_RETRIES = int(os.getenv("RAPIDAPI_MAX_RETRIES", "2"))
+RAPIDAPI_BACKOFF = float(os.getenv("RAPIDAPI_BACKOFF", "0.5")) # base sec, doubles per retry
+RAPIDAPI_MAX_RETRY_WAIT = float(os.getenv("RAPIDAPI_MAX_RETRY_WAIT", "5")) # don't honour a longer Retry-After
+RAPIDAPI_TOTAL_TIMEOUT = float(os.getenv("RAPIDAPI_TOTAL_TIMEOUT", "12")) # whole call incl. retries, leaves time for selenium
+
+# lookups can spend 15-30 sec in selenium, so they run in a bounded thread pool instead of on the event loop
+PNR_LOOKUP_WORKERS = int(os.getenv("PNR_LOOKUP_WORKERS", "4"))
+PNR_LOOKUP_TIMEOUT = float(os.getenv("PNR_LOOKUP_TIMEOUT", "45")) # per request deadline in sec
+
+# warm chrome pool for the selenium fallback
+CHROME_POOL_SIZE = int(os.getenv("CHROME_POOL_SIZE", "2"))
+CHROME_POOL_MAX_USES = int(os.getenv("CHROME_POOL_MAX_USES", "50")) # recycle browser after N lookups
+CHROME_POOL_MAX_IDLE = float(os.getenv("CHROME_POOL_MAX_IDLE", "600")) # quit browser after N sec unused
+
+# chromedriver is resolved once per process, set CHROMEDRIVER_PATH on offline hosts to skip webdriver-manager
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROMEDRIVER_CACHE_FILE = os.getenv(
+    "CHROMEDRIVER_CACHE_FILE",
+    os.path.join(os.path.expanduser("~"), ".cache", "pnr_agent", "chromedriver.json")
+)
+
+# circuit breaker per pnr provider
+PROVIDER_FAILURE_THRESHOLD = int(os.getenv("PROVIDER_FAILURE_THRESHOLD", "3")) # failures in a row before tripping
+PROVIDER_RESET_TIMEOUT = float(os.getenv("PROVIDER_RESET_TIMEOUT", "30")) # sec before a trial call
+
+# hedging: if rapid api is slower than its recent p90, start selenium in parallel and take whichever answers first
+PNR_HEDGE_ENABLED = os.getenv("PNR_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+PNR_HEDGE_PERCENTILE = float(os.getenv("PNR_HEDGE_PERCENTILE", "90"))
+PNR_HEDGE_MIN_DELAY = float(os.getenv("PNR_HEDGE_MIN_DELAY", "1.5")) # sec, also used until we have latency data
+
+# result cache, ttl depends on how likely the status is to change
+PNR_CACHE_TTL_PENDING = float(os.getenv("PNR_CACHE_TTL_PENDING", "60")) # chart not prepared / WL / RAC
+PNR_CACHE_TTL_CONFIRMED = float(os.getenv("PNR_CACHE_TTL_CONFIRMED", "3600")) # chart prepared and all CNF
+PNR_CACHE_MAX_BYTES = int(os.getenv("PNR_CACHE_MAX_BYTES", str(5 * 1024 * 1024)))
+PNR_CACHE_DB = os.getenv("PNR_CACHE_DB") # sqlite file, unset = memory only
+PNR_CACHE_DB_MAX_ROWS = int(os.getenv("PNR_CACHE_DB_MAX_ROWS", "10000")) # oldest rows past this are dropped
+
+# scraper waits on the page instead of sleeping, these are the upper bounds in sec
+SCRAPER_ELEMENT_TIMEOUT = float(os.getenv("SCRAPER_ELEMENT_TIMEOUT", "20"))
+SCRAPER_RESULT_TIMEOUT = float(os.getenv("SCRAPER_RESULT_TIMEOUT", "20"))
+SCRAPER_RETRY_TIMEOUT = float(os.getenv("SCRAPER_RETRY_TIMEOUT", "5")) # extra wait after an error banner
+
+# optional human like delays (off by default), (min, max) sec per step
+HUMANIZE_PROFILES = {
+    "off": {},
+    "light": {
+        "after_load": (0.3, 0.8),
+        "after_click": (0.1, 0.3),
+        "per_key": (0.02, 0.05),
+        "before_submit": (0.2, 0.5),
+    },
+    "full": {
+        "after_load": (2, 4),
+        "after_click": (0.3, 0.7),
+        "per_key": (0.05, 0.15),
+        "before_submit": (0.5, 1.5),
+    },
+}
+SCRAPER_HUMANIZE = os.getenv("SCRAPER_HUMANIZE", "off").lower()
+
+# shared keep-alive session, one tcp+tls handshake per pooled connection instead of per lookup
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=max(PNR_LOOKUP_WORKERS, 4)))
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+http_latency = {} # host -> LatencyHistogram
+
+
+def _observe_latency(host, seconds):
+    if host not in http_latency:
+        http_latency.setdefault(host, LatencyHistogram())
+    http_latency[host].observe(seconds)
+
+
+def http_latency_stats():
+    return {host: hist.snapshot() for host, hist in http_latency.items()}
+
+
+# sec to wait before the next try, Retry-After wins if the server sent one
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except Exception:
+                pass
+    # exponential backoff with full jitter
+    return random.uniform(0, RAPIDAPI_BACKOFF * (2 ** attempt))
+
+
+def _get_with_retries(url, headers, host):
+    """GET with retries on connect errors and 429/5xx, all of it within RAPIDAPI_TOTAL_TIMEOUT.
+    A read timeout is not retried, the server got the request and a second try would just be as slow"""
+    deadline = time.monotonic() + RAPIDAPI_TOTAL_TIMEOUT
+    for attempt in range(RAPIDAPI_MAX_RETRIES + 1):
+        response = None
+        start = time.monotonic()
+        remaining = deadline - start
+        try:
+            timeout = (min(RAPIDAPI_CONNECT_TIMEOUT, remaining), min(RAPIDAPI_READ_TIMEOUT, remaining))
+            response = http_session.get(url, headers=headers, timeout=timeout)
+            _observe_latency(host, time.monotonic() - start)
+            if response.status_code not in RETRY_STATUS:
+                return response
+        except requests.ConnectionError: # includes ConnectTimeout, not ReadTimeout
+            _observe_latency(host, time.monotonic() - start)
+            if attempt == RAPIDAPI_MAX_RETRIES:
+                raise
+        except requests.Timeout:
+            _observe_latency(host, time.monotonic() - start)
+            raise
+
+        if attempt == RAPIDAPI_MAX_RETRIES:
+            return response
+
+        delay = _retry_delay(response, attempt)
+        if delay > RAPIDAPI_MAX_RETRY_WAIT:
+            print(f"Retry-After {delay:.1f}s too long, giving up")
+            return response
+        # the wait plus at least a connect attempt has to fit in what's left
+        if time.monotonic() + delay + RAPIDAPI_CONNECT_TIMEOUT > deadline:
+            print("rapid api time budget used up, giving up")
+            if response is None:
+                raise requests.Timeout("rapid api time budget used up")
+            return response
+        print(f"retrying rapid api in {delay:.2f}s (attempt {attempt + 1})")
+        time.sleep(delay)
+
+
+# rapid api error body for a pnr that doesn't exist (wrong number, flushed after the journey)
+PNR_NOT_FOUND_RE = re.compile(
+    r"(invalid|not valid|not found|flushed|does not exist|not generated).{0,40}pnr"
+    r"|pnr.{0,40}(invalid|not valid|not found|flushed|does not exist|not generated)",
+    re.IGNORECASE,
+)
+
 
 # first try with rapid api 
 def check_pnr_rapidapi(pnr_number):
     print("\n 1. first try with rapid api. . .")
     
-    url = f"https://irctc-indian-railway-pnr-status.p.rapidapi.com/getPNRStatus/{pnr_number}"
+    url = f"https://{RAPIDAPI_HOST}/getPNRStatus/{pnr_number}"
     
     headers = {
         "x-rapidapi-key": rapid_api_key,
-        "x-rapidapi-host": "irctc-indian-railway-pnr-status.p.rapidapi.com"
+        "x-rapidapi-host": RAPIDAPI_HOST
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _get_with_retries(url, headers, RAPIDAPI_HOST)
         response.raise_for_status()
         data = response.json()
         
@@ -41,6 +196,10 @@ def check_pnr_rapidapi(pnr_number):
         if data and "error" not in str(data).lower():
             print("rapid api success")
             return data
+        elif data and PNR_NOT_FOUND_RE.search(str(data)):
+            # a proper answer about the pnr, not a provider problem
+            print("RapidAPI: PNR not found")
+            return NOT_FOUND
         else:
             print("RapidAPI gives error or invalid data")
             return None
@@ -51,6 +210,89 @@ def check_pnr_rapidapi(pnr_number):
 
 
 # not 1 then try the 2 selenium automation
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+_chromedriver_stats = {"source": None, "unavailable": 0} # unavailable = lookups that found no driver resolved
+
+
+# installed chrome version, used as the stamp for the on disk cache
+def get_chrome_version():
+    for binary in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        try:
+            proc = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=5)
+        except Exception:
+            continue
+        if proc.returncode == 0 and proc.stdout.strip():
+            return proc.stdout.strip().split()[-1]
+    return None
+
+
+def _read_chromedriver_cache(chrome_version):
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+    except Exception:
+        return None
+
+    path = cached.get("path")
+    if not path or not os.path.exists(path):
+        return None
+    # chrome got updated -> driver may not match anymore
+    if chrome_version and cached.get("chrome_version") != chrome_version:
+        return None
+    return path
+
+
+def _write_chromedriver_cache(path, chrome_version):
+    try:
+        os.makedirs(os.path.dirname(CHROMEDRIVER_CACHE_FILE), exist_ok=True)
+        with open(CHROMEDRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"path": path, "chrome_version": chrome_version, "resolved_at": time.time()}, f)
+    except Exception as e:
+        print(f"could not write chromedriver cache: {str(e)}")
+
+
+def resolve_chromedriver(download=True):
+    """Find the chromedriver binary once: env override -> disk cache -> webdriver-manager.
+    Call at startup (download=True) so lookups never hit webdriver-manager, the request path
+    passes download=False and fails fast if startup couldn't resolve it."""
+    global _chromedriver_path
+
+    if _chromedriver_path:
+        return _chromedriver_path
+
+    with _chromedriver_lock:
+        if _chromedriver_path:
+            return _chromedriver_path
+
+        if CHROMEDRIVER_PATH:
+            if not os.path.exists(CHROMEDRIVER_PATH):
+                raise Exception(f"CHROMEDRIVER_PATH does not exist: {CHROMEDRIVER_PATH}")
+            _chromedriver_path = CHROMEDRIVER_PATH
+            _chromedriver_stats["source"] = "env"
+            print(f"using chromedriver from CHROMEDRIVER_PATH: {_chromedriver_path}")
+            return _chromedriver_path
+
+        chrome_version = get_chrome_version()
+        path = _read_chromedriver_cache(chrome_version)
+        if path:
+            _chromedriver_stats["source"] = "cache"
+            print(f"using cached chromedriver: {path}")
+        elif not download:
+            _chromedriver_stats["unavailable"] += 1
+            raise Exception("chromedriver is not resolved, set CHROMEDRIVER_PATH or let the startup warm-up download it")
+        else:
+            # download chrome driver (only place webdriver-manager is used)
+            path = ChromeDriverManager().install()
+            _write_chromedriver_cache(path, chrome_version)
+            _chromedriver_stats["source"] = "download"
+            print(f"resolved chromedriver: {path}")
+
+        _chromedriver_path = path
+        return _chromedriver_path
+
+
 def create_stealth_driver():
 
     """this fn makes Selenium Chrome browser that is:
@@ -90,8 +332,8 @@ def create_stealth_driver():
     }
     chrome_options.add_experimental_option("prefs", prefs)
     
-    # download chrome driver and create chrome browser
-    service = Service(ChromeDriverManager().install())
+    # create chrome browser with the driver resolved at startup, never downloads here
+    service = Service(resolve_chromedriver(download=False))
     driver = webdriver.Chrome(service=service, options=chrome_options)
     
     # hide webdriver property
@@ -104,6 +346,31 @@ def create_stealth_driver():
     return driver
 
 
+driver_pool = DriverPool(
+    create_stealth_driver,
+    size=CHROME_POOL_SIZE,
+    max_uses=CHROME_POOL_MAX_USES,
+    max_idle=CHROME_POOL_MAX_IDLE,
+)
+
+
+# pre launch the browsers, call this once at startup (from a background thread, it's slow)
+def warm_driver_pool():
+    try:
+        resolve_chromedriver()
+    except Exception as e:
+        print(f"chromedriver resolve failed: {str(e)}")
+        return
+    print(f"warming chrome pool ({CHROME_POOL_SIZE} browsers)...")
+    driver_pool.warm()
+
+
+def driver_pool_stats():
+    stats = driver_pool.stats()
+    stats["chromedriver"] = dict(_chromedriver_stats)
+    return stats
+
+
 
 # Parse the page and extract ticket information
 def parse_ticket_data(page_text, pnr_number):
@@ -177,24 +444,83 @@ def parse_ticket_data(page_text, pnr_number):
     
     return ticket_data
 
+# text on the result page that means the site has answered
+RESULT_MARKERS = ("Chart not prepared", "Chart prepared")
+ERROR_MARKERS = ("Something went wrong", "Sorry!")
+PASSENGER_STATUS_RE = re.compile(r"\b(CNF|RAC|WL)\b\s*/?\s*[A-Z]*\d")
+
+
+class LookupCancelled(Exception):
+    """raised inside the scraper when a hedged lookup lost the race"""
+
+
+def _check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise LookupCancelled("lookup cancelled")
+
+
+def _human_pause(step):
+    profile = HUMANIZE_PROFILES.get(SCRAPER_HUMANIZE, {})
+    if step in profile:
+        time.sleep(random.uniform(*profile[step]))
+
+
+# wait for the first of the selectors that is clickable, instead of waiting full timeout on each one in turn
+def _wait_for_any(driver, selectors, timeout, cancel_event=None):
+    def find(d):
+        _check_cancelled(cancel_event)
+        for by, selector in selectors:
+            for element in d.find_elements(by, selector):
+                try:
+                    if element.is_displayed() and element.is_enabled():
+                        return element
+                except Exception:
+                    continue
+        return False
+
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.2).until(find)
+    except LookupCancelled:
+        raise
+    except Exception:
+        return None
+
+
+# wait until the page shows a result (chart status / passenger row) or an error banner, returns body text
+def _wait_for_result(driver, timeout, markers, cancel_event=None):
+    def page_ready(d):
+        _check_cancelled(cancel_event)
+        text = d.find_element(By.TAG_NAME, 'body').text
+        if any(m in text for m in markers) or PASSENGER_STATUS_RE.search(text):
+            return text
+        return False
+
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.25).until(page_ready)
+    except LookupCancelled:
+        raise
+    except Exception:
+        return None
+
+
 # finding pnr data by selenium automation
-def check_pnr_automation(pnr_number):
+# cancel_event (threading.Event) stops the scrape early, used when a hedged lookup loses
+def check_pnr_automation(pnr_number, cancel_event=None):
     print("\n 2: trying Selenium automation ...")
     
-    driver = create_stealth_driver() # create hidden browser 
+    lease = driver_pool.acquire() # warm hidden browser from the pool
+    driver = lease["driver"]
     
     try:
         # go to website
         print("Connecting to ConfirmTKT website...")
         driver.get('https://www.confirmtkt.com/pnr-status') # opens the website
+        _check_cancelled(cancel_event)
         
-        time.sleep(random.uniform(2, 4)) # wait for 2-3 sec
-        
-        wait = WebDriverWait(driver, 20) # selenium wait for 20 sec
+        _human_pause("after_load")
         
         # find PNR input field
         print(" find PNR input field...")
-        pnr_input = None
         selectors = [
             (By.NAME, 'pnr'),
             (By.ID, 'pnrNumber'),
@@ -203,35 +529,30 @@ def check_pnr_automation(pnr_number):
             (By.CSS_SELECTOR, "input[type='text']")
         ]
         
-        for by, selector in selectors:
-            try:
-                pnr_input = wait.until(EC.element_to_be_clickable((by, selector)))
-                print(" Found PNR input field")
-                break
-            except:
-                continue
-        
+        pnr_input = _wait_for_any(driver, selectors, SCRAPER_ELEMENT_TIMEOUT, cancel_event)
         if pnr_input is None:
             raise Exception("Could not find PNR input field")
+        print(" Found PNR input field")
         
-        # Human-like typing
         print(" entering PNR number...")
         pnr_input.click()
-        time.sleep(random.uniform(0.3, 0.7))
+        _human_pause("after_click")
         pnr_input.clear()
         
-        # adding small delay to look like human
-        for char in pnr_number:
-            pnr_input.send_keys(char)
-            time.sleep(random.uniform(0.05, 0.15))
+        # type char by char only when a humanize profile asks for it
+        if "per_key" in HUMANIZE_PROFILES.get(SCRAPER_HUMANIZE, {}):
+            for char in pnr_number:
+                pnr_input.send_keys(char)
+                _human_pause("per_key")
+        else:
+            pnr_input.send_keys(pnr_number)
         
         print(f"Entered PNR: {pnr_number}")
         
-        time.sleep(random.uniform(0.5, 1.5))
+        _human_pause("before_submit")
         
         # Find and click submit button
         print(" Finding submit button...")
-        submit_button = None
         button_selectors = [
             (By.XPATH, "//button[@type='submit']"),
             (By.XPATH, "//button[contains(text(), 'Check Status')]"),
@@ -240,37 +561,32 @@ def check_pnr_automation(pnr_number):
             (By.TAG_NAME, "button")
         ]
         
-        for by, selector in button_selectors:
-            try:
-                submit_button = wait.until(EC.element_to_be_clickable((by, selector)))
-                print("Found submit button")
-                break
-            except:
-                continue
-        
+        submit_button = _wait_for_any(driver, button_selectors, SCRAPER_ELEMENT_TIMEOUT, cancel_event)
         if submit_button is None:
             raise Exception("Could not find submit button")
+        print("Found submit button")
         
         driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
-        time.sleep(random.uniform(0.3, 0.7))
+        _human_pause("after_click")
         
+        _check_cancelled(cancel_event)
         submit_button.click()
         print(" Submitted PNR query")
         print(" Waiting for results...\n")
         
-        time.sleep(random.uniform(8, 10))
-        
-        # Get page content
-        page_text = driver.find_element(By.TAG_NAME, 'body').text
-        page_html = driver.page_source
+        # wait for chart status / passenger row / error banner, whichever comes first
+        page_text = _wait_for_result(driver, SCRAPER_RESULT_TIMEOUT, RESULT_MARKERS + ERROR_MARKERS, cancel_event)
+        if page_text is None:
+            raise Exception(f"No result on page after {SCRAPER_RESULT_TIMEOUT} sec")
         
-        # Check for errors
-        if "Something went wrong" in page_text or "Sorry!" in page_text:
+        # Check for errors, the result sometimes loads lazily after a scroll
+        if any(m in page_text for m in ERROR_MARKERS):
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
+            retry_text = _wait_for_result(driver, SCRAPER_RETRY_TIMEOUT, RESULT_MARKERS, cancel_event)
             driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
-            page_text = driver.find_element(By.TAG_NAME, 'body').text
+            page_text = retry_text or driver.find_element(By.TAG_NAME, 'body').text
+        
+        page_html = driver.page_source
         
         # Save HTML for debugging
         try:
@@ -287,6 +603,10 @@ def check_pnr_automation(pnr_number):
         
         return ticket_details
         
+    except LookupCancelled:
+        print(" Automation cancelled, other provider answered first")
+        return None
+        
     except Exception as e:
         print(f"\n Automation Error: {str(e)}")
         try:
@@ -297,8 +617,109 @@ def check_pnr_automation(pnr_number):
         return None
         
     finally:
-        driver.quit()
-        print("Browser closed")
+        driver_pool.release(lease) # reset and hand back, pool recycles it if it is dead
+        print("Browser returned to pool")
+
+
+# pnr sources, tried best first by the router. add a new source with register_pnr_provider
+pnr_router = ProviderRouter()
+
+
+def register_pnr_provider(name, fn):
+    pnr_router.register(
+        name, fn,
+        failure_threshold=PROVIDER_FAILURE_THRESHOLD,
+        reset_timeout=PROVIDER_RESET_TIMEOUT,
+    )
+
+
+register_pnr_provider("rapidapi", check_pnr_rapidapi)
+register_pnr_provider("selenium", lambda pnr, cancel_event=None: check_pnr_automation(str(pnr), cancel_event))
+
+
+def provider_status():
+    return pnr_router.status()
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=PNR_LOOKUP_WORKERS * 2, thread_name_prefix="pnr-hedge")
+_hedge_lock = threading.Lock()
+_hedge_stats = {"lookups": 0, "fired": 0, "won_by": {}}
+
+
+def _hedge_delay(provider):
+    p = provider.latency.percentile(PNR_HEDGE_PERCENTILE)
+    return max(PNR_HEDGE_MIN_DELAY, p or 0)
+
+
+def _record_hedge(fired=False, winner=None):
+    with _hedge_lock:
+        if fired:
+            _hedge_stats["fired"] += 1
+        if winner:
+            _hedge_stats["won_by"][winner] = _hedge_stats["won_by"].get(winner, 0) + 1
+
+
+def fetch_hedged(pnr_number, primary_name="rapidapi", backup_name="selenium"):
+    """Call primary, if it hasn't answered after its recent p90 latency start backup too.
+    First valid result wins, the scraper gets cancelled (its driver goes back to the pool).
+    A losing rapid api call can't be interrupted, it finishes in background and is ignored."""
+
+    primary = pnr_router.get(primary_name)
+    backup = pnr_router.get(backup_name)
+    if primary is None or backup is None or not primary.breaker.allow():
+        return pnr_router.fetch(pnr_number)
+
+    with _hedge_lock:
+        _hedge_stats["lookups"] += 1
+
+    delay = _hedge_delay(primary)
+    first = _hedge_executor.submit(pnr_router.call, primary, pnr_number)
+    done, _ = wait([first], timeout=delay)
+
+    if done:
+        result = first.result()
+        if answered(result):
+            _record_hedge(winner=primary_name)
+            return result, primary_name
+        # primary failed fast, plain fallback
+        if not backup.breaker.allow():
+            return None, None
+        result = pnr_router.call(backup, pnr_number)
+        if answered(result):
+            _record_hedge(winner=backup_name)
+            return result, backup_name
+        return None, None
+
+    if not backup.breaker.allow():
+        result = first.result()
+        return (result, primary_name) if answered(result) else (None, None)
+
+    print(f"\n {primary_name} slower than {delay:.1f}s, hedging with {backup_name}")
+    _record_hedge(fired=True)
+    cancel_event = threading.Event()
+    second = _hedge_executor.submit(pnr_router.call, backup, pnr_number, cancel_event=cancel_event)
+    names = {first: primary_name, second: backup_name}
+
+    pending = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            if answered(result):
+                cancel_event.set()
+                _record_hedge(winner=names[future])
+                return result, names[future]
+
+    return None, None
+
+
+def hedge_stats():
+    with _hedge_lock:
+        stats = dict(_hedge_stats)
+        stats["won_by"] = dict(_hedge_stats["won_by"])
+    stats["enabled"] = PNR_HEDGE_ENABLED
+    stats["percentile"] = PNR_HEDGE_PERCENTILE
+    return stats
 
 
 # Main Function
@@ -312,23 +733,20 @@ def check_pnr_combined(pnr_number):
         print("Invalid PNR! Must be 10 digits.")
         return None
     
-    # Step 1: Try RapidAPI
-    print("\nTrying rapid API ")
-    print("-"*70)
-    
-    api_result = check_pnr_rapidapi(pnr_number)
-    if api_result:
-        return api_result
-    
-    # Step 2: Fallback to Automation
-    print("\nAPI failed. trying automation")
-    print("-"*70)
-    
-    automation_result = check_pnr_automation(str(pnr_number))
-    if automation_result:
-        return automation_result
-    
-    # Both methods failed
+    # try providers in order of recent success / latency, tripped ones are skipped
+    if PNR_HEDGE_ENABLED:
+        result, provider_name = fetch_hedged(pnr_number)
+    else:
+        result, provider_name = pnr_router.fetch(pnr_number)
+    if result is NOT_FOUND:
+        print(f"\n {provider_name}: PNR {pnr_number} not found")
+        return NOT_FOUND
+    if result:
+        print(f"\n got status from {provider_name}")
+        # same record shape whichever provider answered
+        return normalize_logged(result, pnr_number)
+    
+    # All methods failed
     print("\n" + "-"*70)
     print("  FAILED")
     print("-"*70)
@@ -344,49 +762,133 @@ def check_pnr_combined(pnr_number):
 
 
 
+pnr_cache = TTLCache(max_bytes=PNR_CACHE_MAX_BYTES, db_path=PNR_CACHE_DB, max_rows=PNR_CACHE_DB_MAX_ROWS)
 
-# fn takes the json data and language and give a summary in particular language
-def generate_pnr_summary(json_data , lang):
-    
-    
-    if not json_data:
-        return "No PNR data available to summarize."
-    
-    # JSON to string for the LLM
-    json_str = json.dumps(json_data, indent=2)
-    
-    # prompt
-    prompt = f"""You are an Indian Railway PNR assistant.
 
-Output must be extremely short, clear and spoken-friendly because it will be sent to a text-to-speech engine
+# pick cache ttl from ticket state (canonical record, see pnr_schema)
+def pnr_cache_ttl(pnr_data):
+    data = normalize_pnr(pnr_data)
+    if data is None:
+        return PNR_CACHE_TTL_PENDING
 
-Rules:
-- DO NOT repeat the PNR number.
-- Give all ticket details together in one short paragraph.
-- Include: train name and number, class, from–to stations, date, chart status, passenger booking status, and a very short probability of getting confirmed. only if ticket is not confirmed(like 'high', 'medium', or 'low').
-- Keep sentences tiny and natural.
-- End with a friendly greeting like: "Thank you and have a safe journey."
-- note : output in this {lang} language only
-- also use long forms rather then short form (for bsbs -> varanshi, 3E -> 3rd ac)
+    chart_status = str(data["chart_status"] or "").lower()
+    chart_prepared = "prepared" in chart_status and "not" not in chart_status
 
+    statuses = [str(p["current_status"] or "") for p in data["passengers"]]
+    all_confirmed = bool(statuses) and all("CNF" in st.upper() for st in statuses)
 
-PNR Data:
-{json_str}
+    if chart_prepared and all_confirmed:
+        return PNR_CACHE_TTL_CONFIRMED
+    return PNR_CACHE_TTL_PENDING
 
-- VERY IMPORTANT NOTE : do not add any extra information from your side, if not present in PNR data
 
-Summary:"""
-    
+def pnr_cache_stats():
+    return pnr_cache.stats()
+
+
+# bounded executor for the lookup pipeline
+_lookup_executor = ThreadPoolExecutor(max_workers=PNR_LOOKUP_WORKERS, thread_name_prefix="pnr-lookup")
+_lookup_lock = threading.Lock()
+_lookup_stats = {
+    "queued": 0,      # waiting for a free worker
+    "running": 0,
+    "completed": 0,
+    "failed": 0,
+    "timed_out": 0,
+    "coalesced": 0,   # callers that joined an in flight lookup for the same pnr
+}
+
+
+def _run_lookup(pnr_number):
+    with _lookup_lock:
+        _lookup_stats["queued"] -= 1
+        _lookup_stats["running"] += 1
     try:
-        # Get response from LLM
-        response = model.invoke(prompt)
-        summary = response.content.strip()
-        return summary
-        
-    except Exception as e:
-        return f" Error generating summary: {str(e)}\n\nRaw data available - check JSON output."
+        result = check_pnr_combined(pnr_number)
+        if result:
+            pnr_cache.set(str(pnr_number), result, pnr_cache_ttl(result))
+        with _lookup_lock:
+            _lookup_stats["completed" if answered(result) else "failed"] += 1
+        return result
+    except Exception:
+        with _lookup_lock:
+            _lookup_stats["failed"] += 1
+        raise
+    finally:
+        with _lookup_lock:
+            _lookup_stats["running"] -= 1
+
+
+# in flight lookups, concurrent callers for the same pnr share one upstream fetch
+_inflight = {} # pnr -> {"future": Future, "waiters": int}
+
+
+def _finish_inflight(pnr_number, future):
+    with _lookup_lock:
+        if _inflight.get(pnr_number, {}).get("future") is future:
+            del _inflight[pnr_number]
+
+
+async def check_pnr_async(pnr_number, timeout=None):
+    """Run check_pnr_combined in the lookup pool without blocking the event loop.
+    Returns (pnr_data, cache_info), pnr_data is None / NOT_FOUND (both falsy) when there's no status.
+    Raises asyncio.TimeoutError when the deadline passes."""
+
+    pnr_number = str(pnr_number)
+
+    # a memory miss falls through to sqlite, keep that disk read off the event loop
+    cached = await asyncio.to_thread(pnr_cache.get, pnr_number) if PNR_CACHE_DB else pnr_cache.get(pnr_number)
+    if cached is not None:
+        pnr_data, age = cached
+        # entries stored before normalization existed (sqlite) come back canonical too
+        return normalize_pnr(pnr_data, pnr_number), {"cached": True, "age": round(age, 1)}
+
+    with _lookup_lock:
+        flight = _inflight.get(pnr_number)
+        if flight is not None:
+            # same pnr already being fetched, just wait for that one
+            flight["waiters"] += 1
+            _lookup_stats["coalesced"] += 1
+            coalesced = True
+        else:
+            _lookup_stats["queued"] += 1
+            flight = {"future": _lookup_executor.submit(_run_lookup, pnr_number), "waiters": 1}
+            _inflight[pnr_number] = flight
+            coalesced = False
+
+    future = flight["future"]
+    if not coalesced:
+        future.add_done_callback(lambda f: _finish_inflight(pnr_number, f))
+
+    try:
+        # shield so one caller's deadline doesn't cancel the fetch for the others
+        pnr_data = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout or PNR_LOOKUP_TIMEOUT)
+        return pnr_data, {"cached": False, "age": 0, "coalesced": coalesced}
+    except asyncio.TimeoutError:
+        with _lookup_lock:
+            _lookup_stats["timed_out"] += 1
+            # last waiter gone and it never started -> drop it from the queue,
+            # a running scrape can't be interrupted and just finishes in background (and fills the cache).
+            # unlisted here so nobody joins a lookup we are about to cancel
+            abandon = flight["waiters"] == 1 and not future.running() and _inflight.get(pnr_number) is flight
+            if abandon:
+                del _inflight[pnr_number]
+        # not under the lock: cancel() runs the done callbacks right away and _finish_inflight takes _lookup_lock
+        if abandon and future.cancel():
+            with _lookup_lock:
+                _lookup_stats["queued"] -= 1
+        raise
+    finally:
+        with _lookup_lock:
+            flight["waiters"] -= 1
 
 
+def lookup_stats():
+    with _lookup_lock:
+        stats = dict(_lookup_stats)
+    stats["workers"] = PNR_LOOKUP_WORKERS
+    stats["timeout"] = PNR_LOOKUP_TIMEOUT
+    return stats
 
 
 
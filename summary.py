@@ -0,0 +1,383 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+from langchain_groq import ChatGroq
+
+from metrics import LatencyHistogram
+from pnr_cache import TTLCache
+from pnr_schema import compact_json, estimate_tokens, normalize_pnr
+from pnr_templates import render_summary
+
+
+load_dotenv()
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20")) # hard limit per summary, sec
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4")) # summaries in flight at once, the rest wait
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+SUMMARY_RESULT_TTL = float(os.getenv("SUMMARY_RESULT_TTL", "300")) # how long a deferred summary waits to be picked up
+# sqlite file shared by the api workers so /pnr_summary/{id} works on any of them,
+# unset = only the worker that started a summary knows it (fine with a single worker)
+SUMMARY_DEFERRED_DB = os.getenv("SUMMARY_DEFERRED_DB")
+SUMMARY_POLL_INTERVAL = float(os.getenv("SUMMARY_POLL_INTERVAL", "0.25")) # sec between checks for another worker's summary
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", "1800")) # llm summaries of an unchanged ticket, sec
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(2 * 1024 * 1024)))
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "template") # template = phrase tables, llm only if the ticket doesn't fit | llm = always the llm
+
+# the one llm client of the process, its http connection pool is reused by every call
+model = ChatGroq(
+    model=LLM_MODEL,
+    api_key=os.getenv("GROQ_API_KEY"),
+    timeout=LLM_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+)
+
+_llm_slots = None # asyncio.Semaphore, created on first use inside the running loop
+
+# llm summaries by ticket state + language, the value is {"summary", "tokens"} (tokens the call cost)
+summary_cache = TTLCache(max_bytes=SUMMARY_CACHE_MAX_BYTES)
+_pnr_states = OrderedDict() # pnr -> (state hash, cache keys summarized for that state), lru
+_PNR_STATES_MAX = 10000
+
+llm_latency = LatencyHistogram()
+_summary_stats = {
+    "calls": 0,
+    "failed": 0,
+    "timed_out": 0,
+    "waiting": 0,
+    "in_flight": 0,
+    "deferred": 0,
+    "streamed": 0,
+    "template_rendered": 0,
+    "template_fallback": 0,
+    "llm_calls_avoided": 0,
+    "tokens_saved": 0,
+    "invalidated": 0,
+}
+
+# end of a sentence: . ! ? the devanagari danda or the urdu full stop, followed by a space (so 12.30 or 3.5 stay whole)
+SENTENCE_END_RE = re.compile(r"(?<=[.!?\u0964\u0965\u06d4])\s+")
+
+_deferred = {} # summary id -> (task, created_at), summaries started by this worker
+
+# summaries of all workers: {"done": False} while running, then {"done": True, "summary": ...}.
+# no memory tier, the value changes under us in other processes
+_deferred_store = TTLCache(db_path=SUMMARY_DEFERRED_DB, memory=False) if SUMMARY_DEFERRED_DB else None
+
+
+def summary_prompt(json_data, lang):
+    # canonical record as compact JSON for the LLM, raw provider responses are projected first
+    json_str = compact_json(normalize_pnr(json_data) or json_data)
+
+    return f"""You are an Indian Railway PNR assistant.
+
+Output must be extremely short, clear and spoken-friendly because it will be sent to a text-to-speech engine
+
+Rules:
+- DO NOT repeat the PNR number.
+- Give all ticket details together in one short paragraph.
+- Include: train name and number, class, from–to stations, date, chart status, passenger booking status (with coach, berth and berth type when given), and a very short probability of getting confirmed. only if ticket is not confirmed(like 'high', 'medium', or 'low').
+- Keep sentences tiny and natural.
+- End with a friendly greeting like: "Thank you and have a safe journey."
+- note : output in this {lang} language only
+- also use long forms rather then short form (for bsbs -> varanshi, 3E -> 3rd ac)
+
+
+PNR Data:
+{json_str}
+
+- VERY IMPORTANT NOTE : do not add any extra information from your side, if not present in PNR data
+
+Summary:"""
+
+
+def summary_key(json_data, lang):
+    """Cache key from the canonical record (minus the pnr) plus the language,
+    so timestamps and other upstream noise don't matter. None if the payload doesn't look like a ticket"""
+    fields = normalize_pnr(json_data)
+    if not fields or not fields["train_number"] or not fields["passengers"]:
+        return None
+    pnr = fields.pop("pnr")
+    state = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    state_hash = hashlib.sha256(state.encode("utf-8")).hexdigest()
+    key = hashlib.sha256(f"{LLM_MODEL}\n{str(lang).lower()}\n{state_hash}".encode("utf-8")).hexdigest()
+
+    # a new state for a pnr we summarized before (passenger status moved, chart prepared...) drops the old summaries
+    if pnr:
+        old_hash, keys = _pnr_states.pop(pnr, (state_hash, set()))
+        if old_hash != state_hash:
+            for old_key in keys:
+                summary_cache.delete(old_key)
+            _summary_stats["invalidated"] += len(keys)
+            keys = set()
+        keys.add(key)
+        _pnr_states[pnr] = (state_hash, keys)
+        while len(_pnr_states) > _PNR_STATES_MAX:
+            _pnr_states.popitem(last=False)
+    return key
+
+
+def cached_summary(key):
+    entry = summary_cache.get(key) if key else None
+    if entry is None:
+        return None
+    value, _ = entry
+    _summary_stats["llm_calls_avoided"] += 1
+    _summary_stats["tokens_saved"] += value["tokens"]
+    return value["summary"]
+
+
+def cache_summary(key, prompt, summary, tokens=None):
+    if key and summary:
+        tokens = tokens or estimate_tokens(prompt) + estimate_tokens(summary)
+        summary_cache.set(key, {"summary": summary, "tokens": tokens}, SUMMARY_CACHE_TTL)
+
+
+def used_tokens(response):
+    # real count from the provider if langchain has it, estimated otherwise
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+def template_summary(json_data, lang):
+    """summary from the phrase tables (microseconds, no llm), None if the ticket needs the llm"""
+    if SUMMARY_MODE != "template":
+        return None
+    try:
+        text = render_summary(json_data, lang)
+    except Exception as e:
+        print(f"Template summary failed, using the llm: {e}")
+        text = None
+    _summary_stats["template_rendered" if text else "template_fallback"] += 1
+    return text
+
+
+# fn takes the json data and language and give a summary in particular language (blocking, for scripts)
+def generate_pnr_summary(json_data, lang="english"):
+    if not json_data:
+        return "No PNR data available to summarize."
+
+    text = template_summary(json_data, lang)
+    if text:
+        return text
+    key = summary_key(json_data, lang)
+    text = cached_summary(key)
+    if text:
+        return text
+
+    try:
+        # Get response from LLM
+        prompt = summary_prompt(json_data, lang)
+        response = model.invoke(prompt)
+        summary = response.content.strip()
+        cache_summary(key, prompt, summary, used_tokens(response))
+        return summary
+
+    except Exception as e:
+        return f" Error generating summary: {str(e)}\n\nRaw data available - check JSON output."
+
+
+async def summarize(json_data, lang="english"):
+    """Same as generate_pnr_summary but async (ainvoke), limited to LLM_MAX_CONCURRENCY calls at once
+    and cut off after LLM_TIMEOUT. Never raises, errors come back as the summary text like before"""
+    global _llm_slots
+
+    if not json_data:
+        return "No PNR data available to summarize."
+    text = template_summary(json_data, lang)
+    if text:
+        return text
+    key = summary_key(json_data, lang)
+    text = cached_summary(key)
+    if text:
+        return text
+    if _llm_slots is None:
+        _llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    prompt = summary_prompt(json_data, lang)
+    _summary_stats["waiting"] += 1
+    try:
+        await _llm_slots.acquire()
+    finally:
+        _summary_stats["waiting"] -= 1
+
+    _summary_stats["in_flight"] += 1
+    _summary_stats["calls"] += 1
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(model.ainvoke(prompt), timeout=LLM_TIMEOUT)
+        llm_latency.observe(time.perf_counter() - start)
+        summary = response.content.strip()
+        cache_summary(key, prompt, summary, used_tokens(response))
+        return summary
+
+    except asyncio.TimeoutError:
+        _summary_stats["timed_out"] += 1
+        return " Error generating summary: the language model timed out\n\nRaw data available - check JSON output."
+    except Exception as e:
+        _summary_stats["failed"] += 1
+        return f" Error generating summary: {str(e)}\n\nRaw data available - check JSON output."
+    finally:
+        _summary_stats["in_flight"] -= 1
+        _llm_slots.release()
+
+
+async def stream_summary(json_data, lang="english"):
+    """Summary text pieces as the llm generates them (astream), same slot limit as summarize.
+    The whole stream has to finish within LLM_TIMEOUT, raises asyncio.TimeoutError otherwise.
+    A templated or cached summary comes out in one piece"""
+    global _llm_slots
+
+    text = template_summary(json_data, lang)
+    if text:
+        yield text
+        return
+    key = summary_key(json_data, lang)
+    text = cached_summary(key)
+    if text:
+        yield text
+        return
+    if _llm_slots is None:
+        _llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    prompt = summary_prompt(json_data, lang)
+    _summary_stats["waiting"] += 1
+    try:
+        await _llm_slots.acquire()
+    finally:
+        _summary_stats["waiting"] -= 1
+
+    _summary_stats["in_flight"] += 1
+    _summary_stats["calls"] += 1
+    _summary_stats["streamed"] += 1
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tokens = model.astream(prompt)
+    pieces = []
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(tokens.__anext__(), timeout=max(0.1, start + LLM_TIMEOUT - loop.time()))
+            except StopAsyncIteration:
+                break
+            if chunk.content:
+                pieces.append(chunk.content)
+                yield chunk.content
+        llm_latency.observe(loop.time() - start)
+        cache_summary(key, prompt, "".join(pieces).strip())
+    except asyncio.TimeoutError:
+        _summary_stats["timed_out"] += 1
+        raise
+    except Exception:
+        _summary_stats["failed"] += 1
+        raise
+    finally:
+        try:
+            # client gone / timed out: close the llm stream now instead of leaving it to the gc
+            await tokens.aclose()
+        except Exception:
+            pass
+        finally:
+            _summary_stats["in_flight"] -= 1
+            _llm_slots.release()
+
+
+async def split_sentences(pieces):
+    """re-chunk a stream of text pieces into whole sentences"""
+    buffer = ""
+    async for piece in pieces:
+        buffer += piece
+        parts = SENTENCE_END_RE.split(buffer)
+        for sentence in parts[:-1]:
+            if sentence.strip():
+                yield sentence.strip()
+        buffer = parts[-1]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _expire_deferred(summary_id):
+    entry = _deferred.pop(summary_id, None)
+    if entry is not None:
+        entry[0].cancel()
+
+
+def _publish_deferred(summary_id, task):
+    if _deferred_store is None or task.cancelled():
+        return
+    summary = task.result() if task.exception() is None else f" Error generating summary: {task.exception()}"
+    # done callback on the loop, the sqlite write goes to the default executor
+    task.get_loop().run_in_executor(
+        None, _deferred_store.set, summary_id, {"done": True, "summary": summary}, SUMMARY_RESULT_TTL
+    )
+
+
+def _share_deferred(summary_id):
+    # blocking, sqlite: drop old summaries, mark this one pending for the other workers
+    _deferred_store.purge_expired()
+    _deferred_store.set(summary_id, {"done": False}, SUMMARY_RESULT_TTL)
+
+
+async def start_summary(json_data, lang="english"):
+    """Kick off a summary in the background, returns an id for wait_summary.
+    Unclaimed summaries are dropped after SUMMARY_RESULT_TTL"""
+    loop = asyncio.get_running_loop()
+    summary_id = uuid.uuid4().hex
+    task = asyncio.create_task(summarize(json_data, lang))
+    _deferred[summary_id] = (task, time.time())
+    loop.call_later(SUMMARY_RESULT_TTL, _expire_deferred, summary_id)
+
+    if _deferred_store is not None:
+        # pending row first, so the done row from _publish_deferred can't be overwritten by it
+        await asyncio.to_thread(_share_deferred, summary_id)
+        task.add_done_callback(lambda t: _publish_deferred(summary_id, t))
+    _summary_stats["deferred"] += 1
+    return summary_id
+
+
+async def wait_summary(summary_id, timeout=None):
+    """summary text once it's ready, None for an unknown / expired id.
+    Raises asyncio.TimeoutError if it isn't ready within timeout (the summary keeps running).
+    Summaries started by another worker are picked up from the shared store (SUMMARY_DEFERRED_DB)"""
+    timeout = timeout or LLM_TIMEOUT + 5
+    entry = _deferred.get(summary_id)
+    if entry is not None:
+        summary = await asyncio.wait_for(asyncio.shield(entry[0]), timeout=timeout)
+        _deferred.pop(summary_id, None)
+        if _deferred_store is not None:
+            await asyncio.to_thread(_deferred_store.delete, summary_id)
+        return summary
+
+    if _deferred_store is None:
+        return None
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        found = await asyncio.to_thread(_deferred_store.get, summary_id)
+        if found is None:
+            return None
+        value, _ = found
+        if value["done"]:
+            await asyncio.to_thread(_deferred_store.delete, summary_id)
+            return value["summary"]
+        if loop.time() >= deadline:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(SUMMARY_POLL_INTERVAL)
+
+
+def summary_stats():
+    stats = dict(_summary_stats)
+    stats["pending_deferred"] = len(_deferred)
+    stats["deferred_shared"] = _deferred_store is not None
+    stats["max_concurrency"] = LLM_MAX_CONCURRENCY
+    stats["timeout"] = LLM_TIMEOUT
+    stats["latency"] = llm_latency.snapshot()
+    stats["cache"] = summary_cache.stats()
+    return stats
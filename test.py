@@ -1,40 +1,57 @@
 # new api
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, UploadFile, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-import re
-from gtts import gTTS # TTS
 import os
-import tempfile
 from langdetect import detect, DetectorFactory
 
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 
-import wave
-import audioop
-import subprocess
-
-import os
-import tempfile
-import whisper
-from fastapi import UploadFile, File
-from fastapi.responses import JSONResponse
-
-
-whisper_model = whisper.load_model("medium") # recognizer (openai whisper model)
-
-from status_extractor import check_pnr_combined, generate_pnr_summary
+import asyncio
+import base64
+import json
+import time
+
+# recognizer (openai whisper model), loaded lazily or served by asr_service
+import asr
+from pnr_text import extract_pnr_from_text
+from audio_io import decode_audio_bytes, StreamDecoder, AudioDecodeError, SAMPLE_RATE
+from vad import speech_segments, trim_silence, split_speech, vad_stats
+from tts import speech_response, synthesize, tts_stats, load_engines as load_tts_engines # gTTS or local piper voices, streamed
+
+from summary import summarize, start_summary, wait_summary, stream_summary, split_sentences, summary_stats # shared async llm client
+from metrics import LatencyHistogram
+from pnr_schema import normalize_stats
+from status_extractor import (
+    check_pnr_async,
+    lookup_stats,
+    warm_driver_pool,
+    driver_pool_stats,
+    driver_pool,
+    pnr_cache_stats,
+    http_latency_stats,
+    provider_status,
+    hedge_stats,
+)
 
 # langdetect is non-deterministic by default — meaning the same text can return different languages on different runs. Setting the seed forces deterministic output.
 DetectorFactory.seed = 0 
 
 
 load_dotenv()
-key = os.getenv("GROQ_API_KEY")
-model = ChatGroq(model="llama-3.3-70b-versatile", api_key=key) #llm
+
+# websocket streaming recognition
+ASR_STREAM_INTERVAL = float(os.getenv("ASR_STREAM_INTERVAL", "1.0")) # seconds between partial transcriptions
+ASR_STREAM_MAX_SECONDS = float(os.getenv("ASR_STREAM_MAX_SECONDS", "30")) # stop listening after this much audio
+ASR_STREAM_MAX_BYTES = int(os.getenv("ASR_STREAM_MAX_BYTES", str(2 * 1024 * 1024))) # or this much compressed audio
+ASR_STREAM_MAX_DURATION = float(os.getenv("ASR_STREAM_MAX_DURATION", "60")) # or this long on the clock, in sec
+ASR_STREAM_IDLE_TIMEOUT = float(os.getenv("ASR_STREAM_IDLE_TIMEOUT", "10")) # close the socket when no data comes for this long
+ASR_STREAM_COMMIT_GAP_MS = int(os.getenv("ASR_STREAM_COMMIT_GAP_MS", "700")) # silence after speech before it's transcribed for good
+
+# /pnr_status_speech: request -> first spoken sentence ready
+speech_first_audio = LatencyHistogram()
 
 
 app = FastAPI()
@@ -49,11 +66,28 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup():
+    # launch the chrome pool in background so the server is up right away
+    asyncio.get_running_loop().run_in_executor(None, warm_driver_pool)
+    # tts voices load once per process, also in background
+    asyncio.get_running_loop().run_in_executor(None, load_tts_engines)
+    # whisper loads in background too, check /ready before sending audio
+    if not asr.ASR_SERVICE_URL:
+        asr.load_in_background()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    driver_pool.close()
+
+
 class TextInput(BaseModel):
     text: str
 
 class PNRInput(BaseModel):
     pnr: str
+    deferred_summary: bool = False  # return pnr_data right away, summary comes from /pnr_summary/{summary_id}
     language: str = "english"  # Optional language for response
 
 class TTSRequest(BaseModel):
@@ -63,136 +97,6 @@ class TTSRequest(BaseModel):
 
 
 
-#  digit mapping for major Indian languages
-DIGIT_MAPPINGS = {
-    # Hindi/Urdu
-    'शून्य': '0', 'shuny': '0', 'shunya': '0',
-    'एक': '1', 'ek': '1',
-    'दो': '2', 'do': '2',
-    'तीन': '3', 'teen': '3', 'tin': '3',
-    'चार': '4', 'char': '4', 'chaar': '4',
-    'पांच': '5', 'paanch': '5', 'panch': '5', 'punch': '5',
-    'छह': '6', 'chhah': '6', 'chha': '6', 'chhe': '6',
-    'सात': '7', 'saat': '7', 'sat': '7',
-    'आठ': '8', 'aath': '8', 'ath': '8',
-    'नौ': '9', 'nau': '9', 'no': '9',
-   
-    # English
-    'zero': '0',
-    'one': '1',
-    'two': '2',
-    'three': '3',
-    'four': '4',
-    'five': '5',
-    'six': '6',
-    'seven': '7',
-    'eight': '8',
-    'nine': '9',
-   
-    # Bengali
-    'শূন্য': '0', 'shunno': '0',
-    'এক': '1', 'æk': '1',
-    'দুই': '2', 'dui': '2',
-    'তিন': '3', 'tin': '3',
-    'চার': '4', 'char': '4',
-    'পাঁচ': '5', 'pãch': '5',
-    'ছয়': '6', 'choy': '6',
-    'সাত': '7', 'sat': '7',
-    'আট': '8', 'at': '8', 'aat': '8',
-    'নয়': '9', 'noy': '9',
-   
-    # Tamil
-    'பூஜ்ஜியம்': '0', 'poojiyam': '0',
-    'ஒன்று': '1', 'onru': '1', 'ondru': '1',
-    'இரண்டு': '2', 'irandu': '2',
-    'மூன்று': '3', 'moondru': '3', 'munru': '3',
-    'நான்கு': '4', 'naangu': '4', 'nanku': '4',
-    'ஐந்து': '5', 'ainthu': '5',
-    'ஆறு': '6', 'aaru': '6',
-    'ஏழு': '7', 'ezhu': '7',
-    'எட்டு': '8', 'ettu': '8',
-    'ஒன்பது': '9', 'onbathu': '9',
-   
-    # Telugu
-    'సున్న': '0', 'sunna': '0',
-    'ఒకటి': '1', 'okati': '1',
-    'రెండు': '2', 'rendu': '2',
-    'మూడు': '3', 'moodu': '3',
-    'నాలుగు': '4', 'naalugu': '4',
-    'ఐదు': '5', 'aidu': '5',
-    'ఆరు': '6', 'aaru': '6',
-    'ఏడు': '7', 'edu': '7', 'yedu': '7',
-    'ఎనిమిది': '8', 'enimidi': '8',
-    'తొమ్మిది': '9', 'tommidi': '9',
-   
-    # Marathi
-    'शून्य': '0',
-    'एक': '1',
-    'दोन': '2', 'don': '2',
-    'तीन': '3',
-    'चार': '4',
-    'पाच': '5', 'paach': '5',
-    'सहा': '6', 'saha': '6',
-    'सात': '7',
-    'आठ': '8',
-    'नऊ': '9', 'nau': '9',
-   
-    # Gujarati
-    'શૂન્ય': '0',
-    'એક': '1',
-    'બે': '2', 'be': '2',
-    'ત્રણ': '3', 'tran': '3',
-    'ચાર': '4',
-    'પાંચ': '5',
-    'છ': '6', 'chha': '6',
-    'સાત': '7',
-    'આઠ': '8',
-    'નવ': '9', 'nav': '9',
-   
-    # Kannada
-    'ಸೊನ್ನೆ': '0', 'sonne': '0',
-    'ಒಂದು': '1', 'ondu': '1',
-    'ಎರಡು': '2', 'eradu': '2',
-    'ಮೂರು': '3', 'mooru': '3',
-    'ನಾಲ್ಕು': '4', 'naalku': '4',
-    'ಐದು': '5', 'aidu': '5',
-    'ಆರು': '6', 'aaru': '6',
-    'ಏಳು': '7', 'elu': '7',
-    'ಎಂಟು': '8', 'entu': '8',
-    'ಒಂಬತ್ತು': '9', 'ombattu': '9',
-   
-    # Malayalam
-    'പൂജ്യം': '0', 'poojyam': '0',
-    'ഒന്ന്': '1', 'onnu': '1',
-    'രണ്ട്': '2', 'randu': '2',
-    'മൂന്ന്': '3', 'moonnu': '3',
-    'നാല്': '4', 'naalu': '4',
-    'അഞ്ച്': '5', 'anchu': '5',
-    'ആറ്': '6', 'aaru': '6',
-    'ഏഴ്': '7', 'ezhu': '7',
-    'എട്ട്': '8', 'ettu': '8',
-    'ഒമ്പത്': '9', 'ombathu': '9',
-   
-    # Punjabi
-    'ਸਿਫ਼ਰ': '0', 'sifar': '0',
-    'ਇੱਕ': '1', 'ikk': '1',
-    'ਦੋ': '2',
-    'ਤਿੰਨ': '3', 'tinn': '3',
-    'ਚਾਰ': '4',
-    'ਪੰਜ': '5', 'panj': '5',
-    'ਛੇ': '6', 'chhe': '6',
-    'ਸੱਤ': '7', 'satt': '7',
-    'ਅੱਠ': '8', 'atth': '8',
-    'ਨੌਂ': '9', 'naun': '9',
-}
-
-# mapping for faster lookup
-DIGIT_MAPPING_LOWER = {k.lower(): v for k, v in DIGIT_MAPPINGS.items()}
-
-
-
-
-
 # UTILITY FUNCTIONS 
 
 #detects language of the text imput
@@ -218,98 +122,93 @@ def detect_language(text):
         return 'english'
 
 
-def convert_spoken_digits_to_numbers(text):
-    """
-    Convert spoken digits in any language to numeric digits.
-    Handles mixed language scenarios.
-    """
-    # Split text into words
-    words = text.split()
-    converted_words = []
-   
-    for word in words:
-        # remove punctuation but keep the word)
-        cleaned_word = re.sub(r'[^\w\s]', '', word)
-       
-        # Check if this word is a digit word in any language
-        digit = DIGIT_MAPPING_LOWER.get(cleaned_word.lower())
-       
-        if digit:
-            converted_words.append(digit)
-        else:
-            # Keep original word if not a digit
-            converted_words.append(word)
-   
-    return ' '.join(converted_words)
+# whisper language code -> language name used by the summary / tts
+WHISPER_LANG_MAP = {
+    'en': 'english', 'hi': 'hindi', 'ur': 'urdu', 'pa': 'punjabi',
+    'bn': 'bengali', 'te': 'telugu', 'mr': 'marathi', 'ta': 'tamil',
+    'gu': 'gujarati', 'kn': 'kannada', 'ml': 'malayalam'
+}
 
 
+# language name -> tts language code
+TTS_LANG_MAP = {
+    'english': 'en',
+    'hindi': 'hi',
+    'urdu': 'ur',
+    'punjabi': 'pa',
+    'bengali': 'bn',
+    'telugu': 'te',
+    'marathi': 'mr',
+    'tamil': 'ta',
+    'gujarati': 'gu',
+    'kannada': 'kn',
+    'malayalam': 'ml'
+}
 
-#extract PNR from the text
-def extract_pnr_from_text(text):
-    
-    # Convert spoken digits to numeric digits
-    text_with_digits = convert_spoken_digits_to_numbers(text)
-   
-    # lower text
-    text_normalized = text_with_digits.lower()
-   
-    # Remove filler words
-    fillers = ['pause', 'wait', 'uh', 'um', 'है', 'ha', 'hain', 'ka', 'ki', 'ke']
-    for filler in fillers:
-        text_normalized = text_normalized.replace(filler, ' ')
-   
-    # Extract all digit sequences
-    digit_sequences = re.findall(r'\d+', text_normalized)
-   
-    # Try 1: Find any 10-digit sequence
-    for seq in digit_sequences:
-        if len(seq) == 10:
-            return seq
-   
-    # Try 2: Combine consecutive digit groups to form 10 digits
-    all_digits = ''.join(digit_sequences)
-    if len(all_digits) >= 10:
-        # Take first 10 digits
-        return all_digits[:10]
-   
-    return None
+
+# whisper options per recognition mode
+#  free: general transcription (word timestamps on)
+#  pnr: digit focused, no word timestamps, digit prompt per language, capped decode length (see asr_backends)
+def transcribe_options(mode):
+    if mode == "pnr":
+        return {"language": None, "fp16": False, "pnr_mode": True}
+    return {
+        "language": None,  # Auto-detect language
+        "fp16": False,
+        "verbose": False,
+        "word_timestamps": True,  # Enable word timestamps for better accuracy
+    }
+
+
+# silence trimmed, long recordings cut into speech segments (one whisper window each), texts joined
+# returns None if the clip has no speech, so it never reaches whisper
+async def transcribe_speech(samples, mode):
+    segments = split_speech(samples)
+    if not segments:
+        return None
+    results = []
+    for segment in segments:
+        results.append(await asr.transcribe_async(segment, **transcribe_options(mode)))
+    return {
+        "text": " ".join(r["text"].strip() for r in results),
+        "language": results[0].get("language"),
+    }
 
 
 # API ENDPOINTS 
 
 @app.post("/speech_to_text")
-async def speech_to_text(audio: UploadFile = File(...)):
-    """Convert speech audio to text using Whisper with multi-language support"""
-    temp_audio_path = None
-   
+async def speech_to_text(audio: UploadFile = File(...), mode: str = "free"):
+    """Convert speech audio to text using Whisper with multi-language support.
+    mode=pnr uses the faster digit focused decoding"""
     try:
-        # Get original file extension
-        orig_ext = os.path.splitext(getattr(audio, "filename", "") or "")[1].lower() or ".bin"
-       
-        # Save uploaded file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=orig_ext) as temp_audio:
-            content = await audio.read()
-            if not content or len(content) < 10:
-                return JSONResponse(
-                    status_code=400,
-                    content={
-                        "success": False,
-                        "error": "Uploaded audio is empty or too small"
-                    }
-                )
-            temp_audio.write(content)
-            temp_audio_path = temp_audio.name
+        if mode not in ("free", "pnr"):
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": "mode must be 'free' or 'pnr'"}
+            )
+       
+        content = await audio.read()
+        if not content or len(content) < 10:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "success": False,
+                    "error": "Uploaded audio is empty or too small"
+                }
+            )
+       
+        # decode in memory to 16 kHz float32, no temp files
+        samples = await asyncio.to_thread(decode_audio_bytes, content)
        
         # Transcribe using Whisper with language auto-detection
         # This will handle multilingual audio including code-switching
-        result = whisper_model.transcribe(
-            temp_audio_path,
-            language=None,  # Auto-detect language
-            fp16=False,
-            verbose=False,
-            # Enable word timestamps for better accuracy
-            word_timestamps=True
-        )
+        result = await transcribe_speech(samples, mode)
+        if result is None:
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": "No speech detected in audio"}
+            )
        
         text = result["text"].strip()
         detected_lang = result.get("language", "unknown")
@@ -350,6 +249,22 @@ async def speech_to_text(audio: UploadFile = File(...)):
             "detected_language_code": detected_lang
         }
        
+    except AudioDecodeError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": "Could not decode audio. Details: " + str(e)}
+        )
+    except asr.ASRBusy as e:
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "error": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except asr.ASRTimeout as e:
+        return JSONResponse(
+            status_code=504,
+            content={"success": False, "error": str(e)}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -358,14 +273,6 @@ async def speech_to_text(audio: UploadFile = File(...)):
                 "error": str(e)
             }
         )
-   
-    finally:
-        # Clean up temp file
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            try:
-                os.unlink(temp_audio_path)
-            except:
-                pass
 
 
 @app.post("/extract_pnr")
@@ -397,7 +304,7 @@ async def extract_pnr(data: TextInput):
 async def get_pnr_status(data: PNRInput):
     try:
         # SFetch PNR data using(API + Selenium)
-        pnr_data = check_pnr_combined(data.pnr)
+        pnr_data, cache_info = await check_pnr_async(data.pnr)
        
         if not pnr_data:
             return {
@@ -406,16 +313,28 @@ async def get_pnr_status(data: PNRInput):
             }
        
         # summary of the PNR data in the specified language
-        summary = generate_pnr_summary(pnr_data, data.language)
+        # deferred: structured result now, the slow llm call runs in background
+        if data.deferred_summary:
+            summary, summary_id = None, await start_summary(pnr_data, data.language)
+        else:
+            summary, summary_id = await summarize(pnr_data, data.language), None
        
         # Return
         return {
             "success": True,
             "pnr_data": pnr_data,
             "summary": summary,
-            "language": data.language
+            "summary_id": summary_id,
+            "language": data.language,
+            "cached": cache_info["cached"],
+            "cache_age": cache_info["age"]
         }
        
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=504,
+            content={"success": False, "error": "PNR lookup timed out. Please try again."}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -423,43 +342,123 @@ async def get_pnr_status(data: PNRInput):
         )
 
 
+@app.get("/pnr_summary/{summary_id}")
+async def pnr_summary(summary_id: str):
+    """Summary started by /get_pnr_status with deferred_summary, waits until it's ready"""
+    try:
+        summary = await wait_summary(summary_id)
+        if summary is None:
+            return JSONResponse(
+                status_code=404,
+                content={"success": False, "error": "Unknown or expired summary id"}
+            )
+        return {"success": True, "summary": summary}
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=504,
+            content={"success": False, "error": "Summary is taking too long. Please try again."}
+        )
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/pnr_status_speech")
+async def pnr_status_speech(data: PNRInput):
+    """PNR status + spoken summary in one server sent event stream, so the first sentence plays
+    while the llm is still writing the rest:
+      status  {"pnr_data", "language", "cached", "cache_age"}
+      text    {"seq", "sentence"}                          every finished sentence of the summary
+      audio   {"seq", "media_type", "audio"}               base64 clip of that sentence, in order
+      done    {"summary"}
+      error   {"error"}"""
+    start = time.perf_counter()
+    language = data.language.lower()
+    lang_code = TTS_LANG_MAP.get(language, 'en')
+
+    async def events():
+        try:
+            pnr_data, cache_info = await check_pnr_async(data.pnr)
+        except asyncio.TimeoutError:
+            yield sse("error", {"error": "PNR lookup timed out. Please try again."})
+            return
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+            return
+
+        if not pnr_data:
+            yield sse("error", {"error": "Unable to fetch PNR status. Please verify the PNR number."})
+            return
+
+        yield sse("status", {
+            "pnr_data": pnr_data,
+            "language": language,
+            "cached": cache_info["cached"],
+            "cache_age": cache_info["age"]
+        })
+
+        # llm -> sentences -> tts, each sentence is synthesized while the llm keeps writing
+        clips = asyncio.Queue()
+
+        async def produce():
+            try:
+                async for sentence in split_sentences(stream_summary(pnr_data, language)):
+                    await clips.put((sentence, asyncio.create_task(synthesize(sentence, lang_code))))
+            except Exception as e:
+                await clips.put(e)
+            finally:
+                await clips.put(None)
+
+        producer = asyncio.create_task(produce())
+        sentences = []
+        try:
+            while True:
+                item = await clips.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    message = "the language model timed out" if isinstance(item, asyncio.TimeoutError) else str(item)
+                    yield sse("error", {"error": "Error generating summary: " + message})
+                    return
+
+                sentence, clip = item
+                seq = len(sentences)
+                sentences.append(sentence)
+                yield sse("text", {"seq": seq, "sentence": sentence})
+                try:
+                    audio, media_type = await clip
+                except Exception as e:
+                    yield sse("error", {"error": "Text-to-speech failed: " + str(e), "seq": seq})
+                    continue
+                if seq == 0:
+                    speech_first_audio.observe(time.perf_counter() - start)
+                yield sse("audio", {"seq": seq, "media_type": media_type, "audio": base64.b64encode(audio).decode("ascii")})
+
+            yield sse("done", {"summary": " ".join(sentences)})
+        finally:
+            # client went away or we stopped early, don't leave the llm / tts running
+            producer.cancel()
+            while not clips.empty():
+                item = clips.get_nowait()
+                if isinstance(item, tuple):
+                    item[1].cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/text_to_speech")
-async def text_to_speech(data: TTSRequest):
-    temp_audio_path = None
-   
+async def text_to_speech(data: TTSRequest, request: Request):
     try:
-        # Map language to gTTS language code
-        lang_map = {
-            'english': 'en',
-            'hindi': 'hi',
-            'urdu': 'ur',
-            'punjabi': 'pa',
-            'bengali': 'bn',
-            'telugu': 'te',
-            'marathi': 'mr',
-            'tamil': 'ta',
-            'gujarati': 'gu',
-            'kannada': 'kn',
-            'malayalam': 'ml'
-        }
-       
-        lang_code = lang_map.get(data.language.lower(), 'en') # englsh by default
+        # Map language to tts language code
+        lang_code = TTS_LANG_MAP.get(data.language.lower(), 'en') # englsh by default
        
-        # generate speech
-        tts = gTTS(text=data.text, lang=lang_code, slow=False)
-       
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-            tts.save(temp_audio.name)
-            temp_audio_path = temp_audio.name
-       
-        # Return audio file
-        return FileResponse(
-            temp_audio_path,
-            media_type="audio/mpeg",
-            filename="response.mp3",
-            background=None
-        )
+        # cached audio if we have it (or 304 if the browser does), otherwise streamed while synthesized
+        return await speech_response(data.text, lang_code, request.headers.get("if-none-match"))
        
     except Exception as e:
         return JSONResponse(
@@ -468,40 +467,241 @@ async def text_to_speech(data: TTSRequest):
         )
 
 
+@app.get("/text_to_speech")
+async def text_to_speech_get(text: str, language: str, request: Request):
+    """Same as POST but cacheable by the browser (ETag / Cache-Control)"""
+    return await text_to_speech(TTSRequest(text=text, language=language), request)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {"message": "Railway Ticket Status Agent API is running"}
 
 
-# TESTING ENDPOINT 
+@app.get("/ready")
+async def ready():
+    """Readiness of the speech to text model"""
+    status = await asr.readiness_async()
+    if status.get("timed_out"):
+        return JSONResponse(status_code=504, content=status)
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime stats for the lookup pipeline"""
+    return {
+        "pnr_lookup": lookup_stats(),
+        "driver_pool": driver_pool_stats(),
+        "pnr_cache": pnr_cache_stats(),
+        "http_latency": http_latency_stats(),
+        "hedging": hedge_stats(),
+        "pnr_normalize": normalize_stats(),
+        "asr": asr.asr_stats(),
+        "vad": vad_stats(),
+        "summary": summary_stats(),
+        "status_speech_first_audio": speech_first_audio.snapshot(),
+        "tts": tts_stats(),
+    }
+
+
+@app.get("/providers")
+async def providers():
+    """Circuit breaker state and recent stats per PNR provider"""
+    return provider_status()
+
+
+@app.websocket("/ws/speech_to_text")
+async def speech_to_text_stream(websocket: WebSocket):
+    """Streaming recognition. The client sends the recording as binary chunks while the user speaks
+    (one growing webm stream, MediaRecorder timeslices) and the text "stop" when done.
+
+    The chunks go through one ffmpeg for the whole socket, so each byte is decoded once. Speech that
+    ended a while ago is transcribed once and kept, each pass only transcribes what came after it.
+    The socket is closed after ASR_STREAM_IDLE_TIMEOUT without data, and the final pass runs once
+    ASR_STREAM_MAX_DURATION / ASR_STREAM_MAX_BYTES / ASR_STREAM_MAX_SECONDS is reached.
+
+    Server messages:
+      {"type": "partial", "text"}                       every ASR_STREAM_INTERVAL while audio comes in
+      {"type": "pnr", "pnr", "language"}                once two passes agree on the pnr (or on stop), the lookup starts right away
+      {"type": "status", "pnr_data", "summary", ...}    lookup result, then the socket is closed
+      {"type": "error", "error"}"""
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+
+    decoder = None
+    received = 0      # compressed bytes from the client
+    decoded_at = 0    # samples decoded at the last pass
+    committed_at = 0  # samples before this are transcribed for good
+    committed = []    # their texts
+    language_code = None
+    last_pnr = None
+    stopped = False
+    started = last_message = loop.time()
+    next_pass = started + ASR_STREAM_INTERVAL
+
+    try:
+        decoder = StreamDecoder()
+        while True:
+            # collect chunks until it's time for the next pass (or the client says stop)
+            if not stopped:
+                try:
+                    timeout = min(next_pass, last_message + ASR_STREAM_IDLE_TIMEOUT) - loop.time()
+                    msg = await asyncio.wait_for(websocket.receive(), timeout=max(0.0, timeout))
+                    last_message = loop.time()
+                    if msg["type"] == "websocket.disconnect":
+                        return
+                    if msg.get("bytes"):
+                        received += len(msg["bytes"])
+                        await asyncio.to_thread(decoder.feed, msg["bytes"])
+                        if received >= ASR_STREAM_MAX_BYTES:
+                            stopped = True
+                    elif msg.get("text") == "stop":
+                        stopped = True
+                except asyncio.TimeoutError:
+                    if loop.time() - last_message >= ASR_STREAM_IDLE_TIMEOUT:
+                        await websocket.send_json({"type": "error", "error": f"No audio received for {ASR_STREAM_IDLE_TIMEOUT:.0f} seconds"})
+                        break
+                except AudioDecodeError as e:
+                    await websocket.send_json({"type": "error", "error": "Could not decode audio. Details: " + str(e)})
+                    break
+
+                if loop.time() - started >= ASR_STREAM_MAX_DURATION or len(decoder) >= ASR_STREAM_MAX_SECONDS * SAMPLE_RATE:
+                    stopped = True
+
+                if not stopped and (loop.time() < next_pass or len(decoder) == decoded_at):
+                    if loop.time() >= next_pass:
+                        next_pass = loop.time() + ASR_STREAM_INTERVAL
+                    continue
+
+            next_pass = loop.time() + ASR_STREAM_INTERVAL
+
+            if stopped:
+                # end of input, let ffmpeg decode whatever is still in the pipe
+                try:
+                    await asyncio.to_thread(decoder.finish)
+                except AudioDecodeError as e:
+                    await websocket.send_json({"type": "error", "error": "Could not decode audio. Details: " + str(e)})
+                    break
+            decoded_at = len(decoder)
+            pending = decoder.samples(committed_at)
+
+            try:
+                # speech followed by enough silence won't change any more: transcribe it once and keep it
+                # (on the final pass everything left is just the tail)
+                settled = len(pending) - ASR_STREAM_COMMIT_GAP_MS * SAMPLE_RATE // 1000
+                done = [seg for seg in speech_segments(pending) if seg[1] <= settled] if not stopped else []
+                if done:
+                    result = await asr.transcribe_async(pending[done[0][0]:done[-1][1]], **transcribe_options("pnr"))
+                    committed.append(result["text"].strip())
+                    language_code = language_code or result.get("language")
+                    committed_at += done[-1][1]
+                    pending = pending[done[-1][1]:]
+
+                # the rest is still being spoken, transcribed again next pass
+                tail_text = ""
+                speech = trim_silence(pending)
+                if len(speech) > 0:
+                    result = await asr.transcribe_async(speech, **transcribe_options("pnr"))
+                    tail_text = result["text"].strip()
+                    language_code = language_code or result.get("language")
+            except (asr.ASRBusy, asr.ASRTimeout) as e:
+                if not stopped:
+                    continue  # skip this partial, the next one has more audio anyway
+                await websocket.send_json({"type": "error", "error": str(e)})
+                break
+
+            text = " ".join(t for t in committed + [tail_text] if t)
+            # no speech yet, no whisper pass was spent on silence
+            if not text:
+                if stopped:
+                    await websocket.send_json({"type": "error", "error": "No speech detected in audio"})
+                    break
+                continue
+
+            await websocket.send_json({"type": "partial", "text": text})
+
+            pnr = extract_pnr_from_text(text)
+            # confident = same 10 digits on two passes in a row, or whatever the final pass says
+            if not pnr or (pnr != last_pnr and not stopped):
+                last_pnr = pnr
+                if stopped:
+                    await websocket.send_json({"type": "error", "error": "No valid PNR found", "text": text})
+                    break
+                continue
+
+            language = WHISPER_LANG_MAP.get(language_code, 'english')
+            try:
+                text_detected_lang = detect_language(text)
+                if text_detected_lang != 'english':
+                    language = text_detected_lang
+            except:
+                pass
+
+            # start the status lookup now, overlapping whatever the user is still saying
+            lookup = asyncio.create_task(check_pnr_async(pnr))
+            await websocket.send_json({"type": "pnr", "pnr": pnr, "language": language, "text": text})
+
+            try:
+                pnr_data, cache_info = await lookup
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "error", "error": "PNR lookup timed out. Please try again."})
+                break
+
+            if not pnr_data:
+                await websocket.send_json({"type": "error", "error": "Unable to fetch PNR status. Please verify the PNR number.", "pnr": pnr})
+                break
+
+            summary = await summarize(pnr_data, language)
+            await websocket.send_json({
+                "type": "status",
+                "pnr": pnr,
+                "pnr_data": pnr_data,
+                "summary": summary,
+                "language": language,
+                "cached": cache_info["cached"],
+                "cache_age": cache_info["age"]
+            })
+            break
+
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        try:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        if decoder is not None:
+            decoder.close()
+
+
+# TESTING ENDPOINT
 @app.post("/complete_pnr_flow_json")
 async def complete_pnr_flow_json(audio: UploadFile = File(...)):
     "testing endpoint"
-    temp_audio_path = None
-   
     try:
         # Step 1: Convert speech to text
-        orig_ext = os.path.splitext(getattr(audio, "filename", "") or "")[1].lower() or ".bin"
-       
-        with tempfile.NamedTemporaryFile(delete=False, suffix=orig_ext) as temp_audio:
-            content = await audio.read()
-            if not content or len(content) < 10:
-                return JSONResponse(
-                    status_code=400,
-                    content={"success": False, "error": "Audio file is empty or too small"}
-                )
-            temp_audio.write(content)
-            temp_audio_path = temp_audio.name
-       
-        # Transcribe
-        result = whisper_model.transcribe(
-            temp_audio_path,
-            language=None,
-            fp16=False,
-            verbose=False,
-            word_timestamps=True
-        )
+        content = await audio.read()
+        if not content or len(content) < 10:
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": "Audio file is empty or too small"}
+            )
+       
+        samples = await asyncio.to_thread(decode_audio_bytes, content)
+       
+        # Transcribe, this flow only needs the pnr
+        result = await transcribe_speech(samples, "pnr")
+        if result is None:
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": "No speech detected in audio"}
+            )
        
         text = result["text"].strip()
         detected_lang = result.get("language", "en")
@@ -534,7 +734,7 @@ async def complete_pnr_flow_json(audio: UploadFile = File(...)):
             }
        
         # Step 3: Get PNR status
-        pnr_data = check_pnr_combined(pnr)
+        pnr_data, cache_info = await check_pnr_async(pnr)
        
         if not pnr_data:
             return {
@@ -545,7 +745,7 @@ async def complete_pnr_flow_json(audio: UploadFile = File(...)):
             }
        
         # Step 4: Generate summary
-        summary = generate_pnr_summary(pnr_data, user_language)
+        summary = await summarize(pnr_data, user_language)
        
         return {
             "success": True,
@@ -554,21 +754,37 @@ async def complete_pnr_flow_json(audio: UploadFile = File(...)):
             "pnr": pnr,
             "pnr_data": pnr_data,
             "summary": summary,
+            "cached": cache_info["cached"],
+            "cache_age": cache_info["age"],
             "note": "Use /text_to_speech endpoint to convert summary to audio"
         }
        
+    except AudioDecodeError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": "Could not decode audio. Details: " + str(e)}
+        )
+    except asr.ASRBusy as e:
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "error": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except asr.ASRTimeout as e:
+        return JSONResponse(
+            status_code=504,
+            content={"success": False, "error": str(e)}
+        )
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=504,
+            content={"success": False, "error": "PNR lookup timed out. Please try again."}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
-   
-    finally:
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            try:
-                os.unlink(temp_audio_path)
-            except:
-                pass
 
 
 if __name__ == "__main__":
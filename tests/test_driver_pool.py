@@ -0,0 +1,42 @@
+import pytest
+
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def execute_script(self, script):
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_close_quits_drivers_leased_during_shutdown():
+    pool = DriverPool(FakeDriver, size=2)
+    pool.warm()
+    leased = pool.acquire()
+    idle = pool._idle[0]
+
+    pool.close()
+    assert idle["driver"].quit_called
+    assert not leased["driver"].quit_called  # still in use by a lookup
+
+    pool.release(leased)
+    assert leased["driver"].quit_called
+    assert pool.stats()["idle"] == 0 and pool.stats()["leased"] == 0
+
+
+def test_no_leases_after_close():
+    pool = DriverPool(FakeDriver, size=1)
+    pool.close()
+    with pytest.raises(Exception):
+        pool.acquire()
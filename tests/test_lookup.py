@@ -0,0 +1,36 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("selenium")
+
+import status_extractor
+
+
+def test_timeout_on_queued_lookup_does_not_deadlock(monkeypatch):
+    busy = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(busy.wait, 5)  # the only worker is taken, our lookup stays queued
+    monkeypatch.setattr(status_extractor, "_lookup_executor", executor)
+    monkeypatch.setattr(status_extractor, "check_pnr_combined", lambda pnr: None)
+
+    outcome = []
+
+    def run():
+        try:
+            asyncio.run(status_extractor.check_pnr_async("1234567890", timeout=0.05))
+        except asyncio.TimeoutError:
+            outcome.append("timed out")
+
+    caller = threading.Thread(target=run, daemon=True)
+    caller.start()
+    caller.join(2)
+    busy.set()
+    executor.shutdown()
+
+    assert not caller.is_alive(), "event loop deadlocked cancelling the queued lookup"
+    assert outcome == ["timed out"]
+    assert "1234567890" not in status_extractor._inflight
@@ -0,0 +1,22 @@
+import time
+
+from pnr_cache import TTLCache
+
+
+def test_db_drops_expired_and_oldest_rows_on_write(tmp_path):
+    cache = TTLCache(db_path=str(tmp_path / "cache.db"), max_rows=3, purge_every=5)
+    cache.set("stale", {"n": 0}, -1)
+    for i in range(4):
+        cache.set(str(i), {"n": i}, 60)
+        time.sleep(0.001)  # distinct stored_at
+
+    rows = {key for (key,) in cache._db.execute("SELECT key FROM cache")}
+    assert rows == {"1", "2", "3"}
+
+
+def test_db_hit_after_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    TTLCache(db_path=path).set("pnr", {"ok": True}, 60)
+
+    value, age = TTLCache(db_path=path).get("pnr")
+    assert value == {"ok": True} and age >= 0
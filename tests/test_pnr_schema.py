@@ -0,0 +1,76 @@
+from pnr_schema import compact_json, normalize_pnr
+
+
+RAPIDAPI = {
+    "success": True,
+    "timeStamp": "2025-03-01T10:00:00",
+    "data": {
+        "pnrNumber": "8426173950",
+        "trainNumber": "12951",
+        "trainName": "MUMBAI RAJDHANI",
+        "dateOfJourney": "Mar 12, 2025 4:35:00 PM",
+        "boardingPoint": "BCT",
+        "reservationUpto": "NDLS",
+        "journeyClass": "3A",
+        "chartStatus": "Chart Prepared",
+        "passengerList": [
+            {"passengerSerialNumber": 1, "bookingStatusDetails": "WL/45", "currentStatusDetails": "CNF/B4/17/SL",
+             "currentCoachId": "B4", "currentBerthNo": 17, "currentBerthCode": "SL"},
+            {"passengerSerialNumber": 2, "bookingStatusDetails": "WL/46", "currentStatusDetails": "WL/3",
+             "currentCoachId": "", "currentBerthNo": 0, "currentBerthCode": ""},
+        ],
+    },
+}
+
+SCRAPER = {
+    "pnr": "2314567890",
+    "train_number": "12301",
+    "train_name": "HOWRAH RAJDHANI",
+    "date_of_journey": "05-04-2025",
+    "from_station": "HWH",
+    "to_station": "NDLS",
+    "class": "2A",
+    "chart_status": "Chart prepared",
+    "passengers": [
+        {"serial_number": 1, "current_status": "CNF", "booking_status": "CNF", "coach": "A1"},
+    ],
+}
+
+
+def test_rapidapi_record():
+    assert normalize_pnr(RAPIDAPI) == {
+        "pnr": "8426173950",
+        "train_number": "12951",
+        "train_name": "MUMBAI RAJDHANI",
+        "from_station": "BCT",
+        "to_station": "NDLS",
+        "date_of_journey": "2025-03-12",
+        "class": "3A",
+        "chart_status": "Chart Prepared",
+        "passengers": [
+            {"serial_number": 1, "booking_status": "WL/45", "current_status": "CNF/B4/17/SL",
+             "coach": "B4", "berth": "17", "berth_type": "SL"},
+            {"serial_number": 2, "booking_status": "WL/46", "current_status": "WL/3",
+             "coach": None, "berth": None, "berth_type": None},
+        ],
+    }
+
+
+def test_scraper_record_keeps_coach():
+    record = normalize_pnr(SCRAPER)
+    assert record["date_of_journey"] == "2025-04-05"
+    assert record["passengers"] == [
+        {"serial_number": 1, "booking_status": "CNF", "current_status": "CNF", "coach": "A1", "berth": None, "berth_type": None},
+    ]
+
+
+def test_normalize_is_idempotent():
+    for raw in (RAPIDAPI, SCRAPER):
+        record = normalize_pnr(raw)
+        assert normalize_pnr(record) == record
+
+
+def test_compact_json_keeps_seats_drops_pnr_and_empties():
+    text = compact_json(normalize_pnr(RAPIDAPI))
+    assert '"coach":"B4","berth":"17","berth_type":"SL"' in text
+    assert "8426173950" not in text and "null" not in text and '": ' not in text
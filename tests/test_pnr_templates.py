@@ -0,0 +1,174 @@
+import copy
+
+import pytest
+
+from pnr_templates import parse_status, render_summary
+
+
+RAPIDAPI = {
+    "success": True,
+    "data": {
+        "pnrNumber": "8426173950",
+        "trainNumber": "12951",
+        "trainName": "MUMBAI RAJDHANI",
+        "dateOfJourney": "Mar 12, 2025 4:35:00 PM",
+        "sourceStation": "BCT",
+        "destinationStation": "NDLS",
+        "journeyClass": "3A",
+        "chartStatus": "Chart Not Prepared",
+        "passengerList": [
+            {"passengerSerialNumber": 1, "bookingStatusDetails": "WL/45", "currentStatusDetails": "WL/12"},
+            {"passengerSerialNumber": 2, "bookingStatusDetails": "WL/46", "currentStatusDetails": "RAC/3"},
+        ],
+    },
+}
+
+SCRAPER = {
+    "pnr": "2314567890",
+    "train_number": "12301",
+    "train_name": "HOWRAH RAJDHANI",
+    "date_of_journey": "05-04-2025",
+    "from_station": "HWH",
+    "to_station": "NDLS",
+    "class": "2A",
+    "chart_status": "CHART PREPARED",
+    "passengers": [
+        {"serial_number": 1, "booking_status": "CNF/A1/21", "current_status": "CNF/A1/21"},
+    ],
+}
+
+GOLDEN = {
+    ("rapidapi", "english"):
+        "Your train is Mumbai Rajdhani, number 12951. It runs from Mumbai Central to New Delhi. "
+        "Journey date is 12 March 2025. Class is Third AC. The chart is not prepared yet. "
+        "Passenger 1: waiting list number 12. Passenger 2: RAC number 3. "
+        "Chances of confirmation are medium. Thank you and have a safe journey.",
+    ("rapidapi", "hindi"):
+        "आपकी ट्रेन Mumbai Rajdhani है, नंबर 12951। यह Mumbai Central से New Delhi तक जाती है। "
+        "यात्रा की तारीख 12 मार्च 2025 है। क्लास Third AC है। चार्ट अभी तैयार नहीं हुआ है। "
+        "यात्री 1: वेटिंग लिस्ट नंबर 12। यात्री 2: आरएसी नंबर 3। "
+        "कन्फर्म होने की संभावना मध्यम है। धन्यवाद, आपकी यात्रा शुभ हो।",
+    ("rapidapi", "tamil"):
+        "உங்கள் ரயில் Mumbai Rajdhani, எண் 12951. இது Mumbai Central முதல் New Delhi வரை செல்கிறது. "
+        "பயண தேதி 12 மார்ச் 2025. வகுப்பு Third AC. சார்ட் இன்னும் தயாராகவில்லை. "
+        "பயணி 1: காத்திருப்போர் பட்டியல் எண் 12. பயணி 2: ஆர்ஏசி எண் 3. "
+        "உறுதியாகும் வாய்ப்பு நடுத்தரம். நன்றி, உங்கள் பயணம் இனிதாக அமையட்டும்.",
+    ("scraper", "english"):
+        "Your train is Howrah Rajdhani, number 12301. It runs from Howrah Junction to New Delhi. "
+        "Journey date is 5 April 2025. Class is Second AC. The chart is prepared. "
+        "Passenger 1: confirmed, coach A1, berth 21. Thank you and have a safe journey.",
+    ("scraper", "hindi"):
+        "आपकी ट्रेन Howrah Rajdhani है, नंबर 12301। यह Howrah Junction से New Delhi तक जाती है। "
+        "यात्रा की तारीख 5 अप्रैल 2025 है। क्लास Second AC है। चार्ट तैयार हो गया है। "
+        "यात्री 1: कन्फर्म, कोच A1, बर्थ 21। धन्यवाद, आपकी यात्रा शुभ हो।",
+    ("scraper", "tamil"):
+        "உங்கள் ரயில் Howrah Rajdhani, எண் 12301. இது Howrah Junction முதல் New Delhi வரை செல்கிறது. "
+        "பயண தேதி 5 ஏப்ரல் 2025. வகுப்பு Second AC. சார்ட் தயாராகிவிட்டது. "
+        "பயணி 1: உறுதி செய்யப்பட்டது, கோச் A1, பெர்த் 21. நன்றி, உங்கள் பயணம் இனிதாக அமையட்டும்.",
+}
+
+SAMPLES = {"rapidapi": RAPIDAPI, "scraper": SCRAPER}
+
+
+@pytest.mark.parametrize("sample, lang", sorted(GOLDEN))
+def test_golden_summaries(sample, lang):
+    assert render_summary(SAMPLES[sample], lang) == GOLDEN[(sample, lang)]
+
+
+def test_language_codes_and_canonical_input():
+    assert render_summary(RAPIDAPI, "hi") == GOLDEN[("rapidapi", "hindi")]
+    from pnr_schema import normalize_pnr
+    assert render_summary(normalize_pnr(SCRAPER), "english") == GOLDEN[("scraper", "english")]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("CNF/B2/34", {"kind": "cnf", "coach": "B2", "berth": "34", "berth_type": None}),
+    ("CNF/B2/34/LB", {"kind": "cnf", "coach": "B2", "berth": "34", "berth_type": "LB"}),
+    ("CNF", {"kind": "cnf", "coach": None, "berth": None, "berth_type": None}),
+    ("Confirmed", {"kind": "cnf", "coach": None, "berth": None, "berth_type": None}),
+    ("CNF/B2", {"kind": "cnf", "coach": "B2", "berth": None, "berth_type": None}),
+    ("RAC/14", {"kind": "rac", "num": 14}),
+    ("RAC 14", {"kind": "rac", "num": 14}),
+    ("GNWL/23", {"kind": "wl", "num": 23}),
+    ("RLWL 12", {"kind": "wl", "num": 12}),
+    ("PQWL/5", {"kind": "wl", "num": 5}),
+    ("CAN", {"kind": "can"}),
+    ("CANCELLED", {"kind": "can"}),
+    ("NOSB", None),
+    ("W/L 5", None),
+    ("WL", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_status(text, expected):
+    assert parse_status(text) == expected
+
+
+def test_rac_wl_mix_uses_worst_waiting_list():
+    pnr = copy.deepcopy(RAPIDAPI)
+    pnr["data"]["passengerList"][0]["currentStatusDetails"] = "WL/45"
+    assert "Chances of confirmation are low." in render_summary(pnr, "english")
+    pnr["data"]["passengerList"][0]["currentStatusDetails"] = "RAC/1"
+    assert "Chances of confirmation are high." in render_summary(pnr, "english")
+
+
+def test_no_chance_once_chart_is_prepared():
+    pnr = copy.deepcopy(RAPIDAPI)
+    pnr["data"]["chartStatus"] = "Chart Prepared"
+    assert "Chances" not in render_summary(pnr, "english")
+
+
+def _without(sample, *path):
+    pnr = copy.deepcopy(sample)
+    target = pnr
+    for key in path[:-1]:
+        target = target[key]
+    del target[path[-1]]
+    return pnr
+
+
+@pytest.mark.parametrize("pnr", [
+    _without(RAPIDAPI, "data", "trainNumber"),
+    _without(RAPIDAPI, "data", "sourceStation"),
+    _without(SCRAPER, "to_station"),
+    _without(SCRAPER, "passengers"),
+    {"success": False, "error": "upstream down"},
+    None,
+], ids=["no train number", "no source", "no destination", "no passengers", "error payload", "none"])
+def test_missing_fields_fall_back_to_llm(pnr):
+    assert render_summary(pnr, "english") is None
+
+
+def test_unreadable_status_falls_back_to_llm():
+    pnr = copy.deepcopy(RAPIDAPI)
+    pnr["data"]["passengerList"][1]["currentStatusDetails"] = "RAC/WL"
+    assert render_summary(pnr, "english") is None
+
+
+def test_unknown_language_falls_back_to_llm():
+    assert render_summary(SCRAPER, "french") is None
+
+
+def test_train_number_without_name():
+    pnr = _without(SCRAPER, "train_name")
+    assert render_summary(pnr, "english").startswith("Your train number is 12301.")
+
+
+def test_berth_type_from_status():
+    pnr = copy.deepcopy(SCRAPER)
+    pnr["passengers"][0]["current_status"] = "CNF/A1/21/UB"
+    assert "Passenger 1: confirmed, coach A1, berth 21, upper berth." in render_summary(pnr, "english")
+    assert "यात्री 1: कन्फर्म, कोच A1, बर्थ 21, upper berth।" in render_summary(pnr, "hindi")
+
+
+def test_seat_fields_fill_a_bare_status():
+    pnr = copy.deepcopy(RAPIDAPI)
+    pnr["data"]["passengerList"] = [{
+        "passengerSerialNumber": 1, "currentStatusDetails": "CNF",
+        "currentCoachId": "B4", "currentBerthNo": 17, "currentBerthCode": "SL",
+    }]
+    assert "Passenger 1: confirmed, coach B4, berth 17, side lower berth." in render_summary(pnr, "english")
+
+    pnr = copy.deepcopy(SCRAPER)
+    pnr["passengers"][0].update({"current_status": "CNF", "coach": "A1"})
+    assert "Passenger 1: confirmed, coach A1." in render_summary(pnr, "english")
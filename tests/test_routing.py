@@ -0,0 +1,45 @@
+from routing import NOT_FOUND, ProviderRouter
+
+
+def make_router(results):
+    router = ProviderRouter()
+    for name in ("rapidapi", "selenium"):
+        router.register(name, lambda pnr, name=name: results[name])
+    return router
+
+
+def names(router):
+    return [provider.name for provider in router.ordered()]
+
+
+def test_registration_order_without_data():
+    router = make_router({"rapidapi": None, "selenium": None})
+    assert names(router) == ["rapidapi", "selenium"]
+
+
+def test_untried_provider_stays_behind_first_success():
+    router = make_router({"rapidapi": {"ok": True}, "selenium": {"ok": True}})
+    data, name = router.fetch("1234567890")
+    assert name == "rapidapi" and data == {"ok": True}
+    # selenium has no latency yet, it must not be treated as the fastest
+    assert names(router) == ["rapidapi", "selenium"]
+    assert router.fetch("1234567890")[1] == "rapidapi"
+    assert router.get("selenium").calls == 0
+
+
+def test_failing_provider_drops_behind():
+    router = make_router({"rapidapi": None, "selenium": {"ok": True}})
+    for _ in range(3):
+        router.fetch("1234567890")
+    assert names(router) == ["selenium", "rapidapi"]
+
+
+def test_not_found_is_a_healthy_answer():
+    router = make_router({"rapidapi": NOT_FOUND, "selenium": {"ok": True}})
+    for _ in range(5):
+        data, name = router.fetch("1234567890")
+        assert data is NOT_FOUND and name == "rapidapi"
+    # an unknown pnr says nothing bad about the provider: breaker closed, scraper never tried
+    assert router.get("rapidapi").breaker.status()["state"] == "closed"
+    assert router.get("selenium").calls == 0
+    assert not NOT_FOUND
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio_io import SAMPLE_RATE
+from vad import speech_segments, split_speech
+
+
+def speech_like(seconds, dbfs, seed=0):
+    """noise shaped by a 4 Hz syllable envelope, rms at about `dbfs`"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.15 + 0.85 * np.abs(np.sin(2 * np.pi * 2 * t))
+    signal = rng.standard_normal(len(t)) * envelope
+    signal *= 10 ** (dbfs / 20) / np.sqrt(np.mean(signal ** 2))
+    return signal.astype(np.float32)
+
+
+def noise(seconds, dbfs, seed=1):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 10 ** (dbfs / 20)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dbfs", [-36, -42, -20])
+def test_continuous_speech_is_one_segment(dbfs):
+    clip = speech_like(5, dbfs)
+    segments = speech_segments(clip)
+    assert len(segments) == 1
+    start, end = segments[0]
+    assert start < 0.3 * SAMPLE_RATE and end > len(clip) - 0.3 * SAMPLE_RATE
+
+
+def test_speech_between_silence():
+    clip = np.concatenate([noise(2, -70), speech_like(2, -36), noise(2, -70, seed=2)])
+    (start, end), = speech_segments(clip)
+    assert 1.6 * SAMPLE_RATE < start < 2.1 * SAMPLE_RATE
+    assert 3.9 * SAMPLE_RATE < end < 4.4 * SAMPLE_RATE
+
+
+@pytest.mark.parametrize("clip", [noise(3, -40), noise(3, -70), np.zeros(3 * SAMPLE_RATE, dtype=np.float32)],
+                         ids=["steady hiss", "quiet room", "digital silence"])
+def test_no_speech(clip):
+    assert speech_segments(clip) == []
+
+
+def test_long_speech_is_cut_in_a_pause():
+    clip = np.concatenate([speech_like(4, -30), noise(0.2, -70), speech_like(8, -30, seed=3)])
+    chunks = split_speech(clip, max_segment_sec=5)
+    assert all(len(c) <= 5 * SAMPLE_RATE for c in chunks)
+    # the first cut lands in the pause at 4.0 - 4.2 sec, not at the 5 sec limit
+    assert 4.0 * SAMPLE_RATE <= len(chunks[0]) <= 4.2 * SAMPLE_RATE
+    assert len(clip) - sum(len(c) for c in chunks) < 0.03 * SAMPLE_RATE  # only the trailing partial frame
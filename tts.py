@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.responses import Response, StreamingResponse
+
+from metrics import LatencyHistogram
+from tts_cache import AudioCache
+from tts_engines import create_engine
+
+
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts") # gtts | piper (see tts_engines)
+TTS_FALLBACK_ENGINE = os.getenv("TTS_FALLBACK_ENGINE", "gtts") # for languages the main engine has no voice for, empty = none
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2")) # concurrent syntheses, the rest wait in line
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") # directory for the disk tier, unset = memory only
+TTS_CACHE_DISK_MAX_BYTES = int(os.getenv("TTS_CACHE_DISK_MAX_BYTES", str(200 * 1024 * 1024)))
+TTS_CACHE_MAX_AGE = int(os.getenv("TTS_CACHE_MAX_AGE", "86400")) # Cache-Control for browsers, in sec
+
+tts_cache = AudioCache(max_bytes=TTS_CACHE_MAX_BYTES, disk_dir=TTS_CACHE_DIR, disk_max_bytes=TTS_CACHE_DISK_MAX_BYTES)
+
+# synthesis runs here, engines are shared by the threads (onnx / network io release the gil)
+_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+_engines = {} # name -> loaded engine, once per process
+_engines_lock = threading.Lock()
+
+tts_first_byte = {} # engine -> LatencyHistogram, request -> first audio chunk
+tts_total = {}      # engine -> LatencyHistogram, request -> last audio chunk
+
+_tts_stats = {
+    "requests": 0,
+    "failed": 0,
+    "bytes": 0,
+    "not_modified": 0,
+    "fallbacks": 0,
+}
+
+
+def get_engine(name):
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = create_engine(name)
+                _engines[name] = engine
+                tts_first_byte[name] = LatencyHistogram()
+                tts_total[name] = LatencyHistogram()
+    return engine
+
+
+def load_engines():
+    """load the voices up front (blocking), call from the startup hook in an executor"""
+    for name in filter(None, (TTS_ENGINE, TTS_FALLBACK_ENGINE)):
+        try:
+            get_engine(name)
+        except Exception as e:
+            print(f"TTS engine '{name}' failed to load: {e}")
+
+
+def pick_engine(lang_code):
+    engine = get_engine(TTS_ENGINE)
+    if engine.supports(lang_code):
+        return engine
+    if TTS_FALLBACK_ENGINE and TTS_FALLBACK_ENGINE != TTS_ENGINE:
+        fallback = get_engine(TTS_FALLBACK_ENGINE)
+        if fallback.supports(lang_code):
+            _tts_stats["fallbacks"] += 1
+            return fallback
+    raise ValueError(f"no TTS voice for language '{lang_code}'")
+
+
+def tts_key(text, lang_code, voice):
+    return hashlib.sha256(f"{voice}\n{lang_code}\n{text.strip()}".encode("utf-8")).hexdigest()
+
+
+async def _timed(engine, first, rest, start, cache_key=None):
+    """yields the chunks and records the total synthesis time + bytes once the client got everything,
+    the complete audio goes into the cache"""
+    loop = asyncio.get_running_loop()
+    audio = [first]
+    _tts_stats["bytes"] += len(first)
+    yield first
+    try:
+        while True:
+            chunk = await loop.run_in_executor(_executor, next, rest, None)
+            if chunk is None:
+                break
+            audio.append(chunk)
+            _tts_stats["bytes"] += len(chunk)
+            yield chunk
+    except Exception as e:
+        # headers are gone already, all we can do is cut the stream short (and not cache it)
+        _tts_stats["failed"] += 1
+        print(f"TTS stream failed mid way: {e}")
+        return
+    tts_total[engine.name].observe(time.perf_counter() - start)
+    if cache_key:
+        tts_cache.set(cache_key, b"".join(audio))
+
+
+async def stream_speech(text, lang_code, engine=None, cache_key=None):
+    """Start synthesis and wait only for the first chunk, so a failing engine still becomes a normal
+    error response. Returns an async iterator over the audio chunks for StreamingResponse,
+    every chunk is produced on the tts worker pool. Nothing is written to disk."""
+    engine = engine or pick_engine(lang_code)
+    _tts_stats["requests"] += 1
+    start = time.perf_counter()
+    try:
+        chunks = iter(engine.synthesize(text, lang_code))
+        first = await asyncio.get_running_loop().run_in_executor(_executor, next, chunks, b"")
+    except Exception:
+        _tts_stats["failed"] += 1
+        raise
+    tts_first_byte[engine.name].observe(time.perf_counter() - start)
+    return _timed(engine, first, chunks, start, cache_key)
+
+
+async def speech_response(text, lang_code, if_none_match=None):
+    """audio response for the tts endpoints: 304 if the browser already has it, cached bytes on a hit
+    (with ETag / max-age), otherwise streamed while it's synthesized, no-store, and cached once complete"""
+    engine = await asyncio.to_thread(pick_engine, lang_code) # first call loads the voices
+    key = tts_key(text, lang_code, engine.voice(lang_code))
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={TTS_CACHE_MAX_AGE}",
+        "Content-Disposition": f'inline; filename="response.{"wav" if engine.media_type == "audio/wav" else "mp3"}"',
+        "X-TTS-Engine": engine.name,
+    }
+
+    if if_none_match and headers["ETag"] in if_none_match:
+        _tts_stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+
+    audio = await asyncio.to_thread(tts_cache.get, key)
+    if audio is not None:
+        return Response(content=audio, media_type=engine.media_type, headers=headers)
+
+    # nothing the browser may keep: if synthesis fails halfway the clip is cut off,
+    # the next request gets the complete bytes from the cache with the ETag
+    del headers["ETag"]
+    headers["Cache-Control"] = "no-store"
+    chunks = await stream_speech(text, lang_code, engine=engine, cache_key=key)
+    return StreamingResponse(chunks, media_type=engine.media_type, headers=headers)
+
+
+async def synthesize(text, lang_code):
+    """whole clip for text (from the cache if we have it), returns (audio bytes, media type)"""
+    engine = await asyncio.to_thread(pick_engine, lang_code)
+    key = tts_key(text, lang_code, engine.voice(lang_code))
+    audio = await asyncio.to_thread(tts_cache.get, key)
+    if audio is None:
+        chunks = await stream_speech(text, lang_code, engine=engine, cache_key=key)
+        audio = b"".join([chunk async for chunk in chunks])
+    return audio, engine.media_type
+
+
+def tts_stats():
+    return {
+        **_tts_stats,
+        "engine": TTS_ENGINE,
+        "fallback_engine": TTS_FALLBACK_ENGINE or None,
+        "workers": TTS_WORKERS,
+        "loaded": {name: sorted(getattr(engine, "voices", {})) or "all" for name, engine in _engines.items()},
+        "cache": tts_cache.stats(),
+        "time_to_first_byte": {name: hist.snapshot() for name, hist in tts_first_byte.items()},
+        "total_time": {name: hist.snapshot() for name, hist in tts_total.items()},
+    }
@@ -0,0 +1,137 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class AudioCache:
+    """Content addressed cache for synthesized audio, keys are hashes of (text, language, voice).
+
+    Memory tier: LRU with a byte budget. Disk tier (optional, `disk_dir`): one <key>.mp3 file per entry,
+    also LRU with its own byte budget (file mtime = last use, so the order survives a restart).
+    No TTL, the same key always means the same audio."""
+
+    def __init__(self, max_bytes=20 * 1024 * 1024, disk_dir=None, disk_max_bytes=200 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries = OrderedDict() # key -> audio bytes
+        self._bytes = 0
+        self._disk = OrderedDict()    # key -> file size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0, "disk_evictions": 0, "bytes_saved": 0}
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def get(self, key):
+        """audio bytes or None"""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+            elif key in self._disk:
+                audio = self._disk_read(key)
+                if audio is not None:
+                    self._put(key, audio)
+                    self._stats["disk_hits"] += 1
+
+            if audio is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["bytes_saved"] += len(audio)
+            return audio
+
+    def set(self, key, audio):
+        with self._lock:
+            self._put(key, audio)
+            if self.disk_dir:
+                self._disk_write(key, audio)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["disk_entries"] = len(self._disk)
+            stats["disk_bytes"] = self._disk_bytes
+        stats["max_bytes"] = self.max_bytes
+        stats["disk_max_bytes"] = self.disk_max_bytes if self.disk_dir else None
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / total, 3) if total else 0.0
+        return stats
+
+    # helpers, all called with self._lock held
+
+    def _put(self, key, audio):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        if len(audio) > self.max_bytes:
+            return
+        self._entries[key] = audio
+        self._bytes += len(audio)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key + ".mp3")
+
+    def _load_disk_index(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".mp3"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            files.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _disk_read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path) # mark as recently used
+        except OSError:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+        self._disk.move_to_end(key)
+        return audio
+
+    def _disk_write(self, key, audio):
+        if key in self._disk or len(audio) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path) # readers never see half a file
+        except OSError as e:
+            print(f"tts cache disk write failed: {str(e)}")
+            return
+        self._disk[key] = len(audio)
+        self._disk_bytes += len(audio)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._stats["disk_evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
@@ -0,0 +1,108 @@
+import os
+import struct
+
+
+TTS_GTTS_TIMEOUT = float(os.getenv("TTS_GTTS_TIMEOUT", "10")) # per request to google, sec
+PIPER_VOICE_DIR = os.getenv("PIPER_VOICE_DIR", "voices") # <lang>_<REGION>-<name>-<quality>.onnx (+ .onnx.json), e.g. hi_IN-pratham-medium.onnx
+
+
+def _wav_header(sample_rate, channels=1, sample_width=2):
+    """wav header for a stream of unknown length (sizes set to max, players read until the end)"""
+    byte_rate = sample_rate * channels * sample_width
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+class TTSEngine:
+    """Text to speech engine. synthesize yields audio chunks (bytes) of `media_type` as they are produced.
+    Engines are created once per process and shared by the tts worker threads."""
+
+    name = None
+    media_type = "audio/mpeg"
+
+    def load(self):
+        pass
+
+    def supports(self, lang_code):
+        return True
+
+    # id of the voice used for lang_code, goes into the tts cache key
+    def voice(self, lang_code):
+        return f"{self.name}:{lang_code}"
+
+    def synthesize(self, text, lang_code):
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """google translate tts, needs network, one request per ~100 chars of text"""
+
+    name = "gtts"
+
+    def voice(self, lang_code):
+        return f"gtts:{lang_code}:normal"
+
+    def synthesize(self, text, lang_code):
+        from gtts import gTTS
+        return gTTS(text=text, lang=lang_code, slow=False, timeout=TTS_GTTS_TIMEOUT).stream()
+
+
+class PiperEngine(TTSEngine):
+    """piper onnx voices on cpu, fully local. One voice per language, found in PIPER_VOICE_DIR.
+    Streams 16 bit wav, one chunk per sentence."""
+
+    name = "piper"
+    media_type = "audio/wav"
+
+    def __init__(self, voice_dir=PIPER_VOICE_DIR):
+        self.voice_dir = voice_dir
+        self.paths = {}  # lang code -> model path
+        self.voices = {} # lang code -> PiperVoice
+
+    def load(self):
+        from piper import PiperVoice
+
+        if os.path.isdir(self.voice_dir):
+            for name in sorted(os.listdir(self.voice_dir)):
+                if name.endswith(".onnx"):
+                    lang_code = name.split("-")[0].split("_")[0]
+                    self.paths.setdefault(lang_code, os.path.join(self.voice_dir, name))
+
+        for lang_code, path in self.paths.items():
+            print(f"loading piper voice {os.path.basename(path)} for '{lang_code}'")
+            self.voices[lang_code] = PiperVoice.load(path)
+
+    def supports(self, lang_code):
+        return lang_code in self.voices
+
+    def voice(self, lang_code):
+        return f"piper:{os.path.basename(self.paths.get(lang_code, ''))}"
+
+    def synthesize(self, text, lang_code):
+        voice = self.voices[lang_code]
+        yield _wav_header(voice.config.sample_rate)
+        if hasattr(voice, "synthesize_stream_raw"):
+            # piper-tts 1.2
+            for pcm in voice.synthesize_stream_raw(text):
+                yield pcm
+        else:
+            # piper-tts 1.3+
+            for chunk in voice.synthesize(text):
+                yield chunk.audio_int16_bytes
+
+
+ENGINES = {
+    GTTSEngine.name: GTTSEngine,
+    PiperEngine.name: PiperEngine,
+}
+
+
+def create_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"unknown TTS engine '{name}', choose from {', '.join(ENGINES)}")
+    engine = ENGINES[name]()
+    engine.load()
+    return engine
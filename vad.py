@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE
+
+
+# energy based voice activity detection, cheap enough to run on every request
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "12")) # speech = this many dB above the noise floor
+VAD_MIN_DBFS = float(os.getenv("VAD_MIN_DBFS", "-50")) # anything quieter than this is never speech
+VAD_MIN_RANGE_DB = float(os.getenv("VAD_MIN_RANGE_DB", "6")) # a clip flatter than this (hum, hiss, silence) has no speech
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "200")) # keep a bit around speech so words aren't clipped
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250")) # shorter blips are noise
+
+
+def _frame_dbfs(samples, frame_len):
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.array([])
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_segments(samples, max_gap_ms=500):
+    """[(start, end), ...] sample ranges that contain speech, gaps shorter than max_gap_ms are merged"""
+    frame_len = SAMPLE_RATE * VAD_FRAME_MS // 1000
+    db = _frame_dbfs(samples, frame_len)
+    if len(db) == 0:
+        return []
+
+    # noise floor = quiet end of the clip, peak = loud end. speech always moves between syllables,
+    # steady noise doesn't, so a clip with no range at all is all noise (or all silence)
+    noise_floor = np.percentile(db, 10)
+    peak = np.percentile(db, 95)
+    if peak - noise_floor < VAD_MIN_RANGE_DB:
+        return []
+
+    # a clip that is speech from start to end has no quiet frames, its "noise floor" is speech too,
+    # so the threshold never goes above the middle of the clip's own range
+    threshold = min(noise_floor + VAD_THRESHOLD_DB, (noise_floor + peak) / 2)
+    voiced = db > max(threshold, VAD_MIN_DBFS)
+
+    segments = []
+    start = None
+    for i, is_speech in enumerate(voiced):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            segments.append([start, i])
+            start = None
+    if start is not None:
+        segments.append([start, len(voiced)])
+
+    # merge close segments, drop blips
+    max_gap = max_gap_ms // VAD_FRAME_MS
+    merged = []
+    for seg in segments:
+        if merged and seg[0] - merged[-1][1] <= max_gap:
+            merged[-1][1] = seg[1]
+        else:
+            merged.append(seg)
+
+    min_frames = max(1, VAD_MIN_SPEECH_MS // VAD_FRAME_MS)
+    pad = VAD_PADDING_MS // VAD_FRAME_MS
+    return [
+        (max(0, s - pad) * frame_len, min(len(voiced), e + pad) * frame_len)
+        for s, e in merged if e - s >= min_frames
+    ]
+
+
+def has_speech(samples):
+    return bool(speech_segments(samples))
+
+
+def trim_silence(samples):
+    """cut leading and trailing silence, returns an empty array if there is no speech at all"""
+    segments = speech_segments(samples)
+    if not segments:
+        return samples[:0]
+    return samples[segments[0][0]:segments[-1][1]]
+
+
+VAD_MAX_SEGMENT_SEC = float(os.getenv("VAD_MAX_SEGMENT_SEC", "30")) # one whisper window per segment
+VAD_SPLIT_SEARCH_SEC = float(os.getenv("VAD_SPLIT_SEARCH_SEC", "3")) # a long segment is cut at its quietest frame this close to the limit
+
+_vad_stats = {
+    "clips": 0,
+    "rejected_empty": 0,
+    "segmented": 0,   # clips that were cut into more than one segment
+    "segments": 0,
+    "input_seconds": 0.0,
+    "speech_seconds": 0.0,
+}
+
+
+def _quietest_cut(samples, start, max_len):
+    """sample index to end a piece that starts at `start`: the end of the quietest frame in the
+    last VAD_SPLIT_SEARCH_SEC before start + max_len, so the cut lands between words rather than in one"""
+    frame_len = SAMPLE_RATE * VAD_FRAME_MS // 1000
+    search = min(int(VAD_SPLIT_SEARCH_SEC * SAMPLE_RATE), max_len // 2)
+    first = (start + max_len - search) // frame_len
+    last = (start + max_len) // frame_len # frames [first, last) end inside the limit
+    if last <= first:
+        return start + max_len
+    db = _frame_dbfs(samples[first * frame_len:last * frame_len], frame_len)
+    return (first + int(np.argmin(db)) + 1) * frame_len
+
+
+def split_speech(samples, max_segment_sec=None):
+    """Speech only pieces of a clip, each at most max_segment_sec long, silence in between is dropped.
+    Returns [] when the clip has no speech at all"""
+    max_len = int((max_segment_sec or VAD_MAX_SEGMENT_SEC) * SAMPLE_RATE)
+    segments = speech_segments(samples)
+
+    # cut segments that are too long on their own (in a pause if there is one), then pack neighbours together while they fit
+    ranges = []
+    for start, end in segments:
+        while end - start > max_len:
+            cut = _quietest_cut(samples, start, max_len)
+            ranges.append((start, cut))
+            start = cut
+        ranges.append((start, end))
+
+    groups = []
+    for start, end in ranges:
+        if groups and sum(e - s for s, e in groups[-1]) + end - start <= max_len:
+            groups[-1].append((start, end))
+        else:
+            groups.append([(start, end)])
+
+    chunks = [np.concatenate([samples[s:e] for s, e in group]) for group in groups]
+
+    _vad_stats["clips"] += 1
+    _vad_stats["input_seconds"] += len(samples) / SAMPLE_RATE
+    _vad_stats["speech_seconds"] += sum(len(c) for c in chunks) / SAMPLE_RATE
+    _vad_stats["segments"] += len(chunks)
+    if not chunks:
+        _vad_stats["rejected_empty"] += 1
+    elif len(chunks) > 1:
+        _vad_stats["segmented"] += 1
+    return chunks
+
+
+def vad_stats():
+    stats = dict(_vad_stats)
+    stats["trimmed_seconds"] = round(stats["input_seconds"] - stats["speech_seconds"], 2)
+    stats["trimmed_ratio"] = round(stats["trimmed_seconds"] / stats["input_seconds"], 3) if stats["input_seconds"] else None
+    stats["input_seconds"] = round(stats["input_seconds"], 2)
+    stats["speech_seconds"] = round(stats["speech_seconds"], 2)
+    return stats